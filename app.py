@@ -1,8 +1,6 @@
 # app.py
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials
-from utils.auth import login_user, signup_user, init_auth
+from utils.auth import login_user, signup_user, init_auth, init_firebase
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -12,9 +10,7 @@ st.set_page_config(
 )
 
 # --- Firebase Initialization ---
-if not firebase_admin._apps:
-    creds = credentials.Certificate(dict(st.secrets["firebase_credentials"]))
-    firebase_admin.initialize_app(creds)
+init_firebase()
 
 # --- Initialize Authentication System ---
 init_auth()
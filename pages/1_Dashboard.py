@@ -2,111 +2,181 @@
 
 import streamlit as st
 import re
-import json
-from utils.ai import generate_plan_with_groq
-from utils.db import save_plan_to_firestore, get_user_plans, delete_plan_from_firestore, get_dashboard_summary
-from utils.auth import logout_user
+import pandas as pd
+from utils.db import save_plan_to_firestore, delete_plan_from_firestore, get_dashboard_bundle, migrate_legacy_plans, _parse_plan_content
+from utils.auth import logout_user, get_display_name
 
 st.set_page_config(page_title="Dashboard - AI Learning Coach", page_icon="🎓", layout="wide")
 
+# Legacy text-plan parsing, compiled once per process
+_LINE_KIND_RE = re.compile(r'(?P<bullet>[\*\-•])|(?P<header>#)')
+_BULLET_RE = re.compile(r'[\*\-•]\s*(?P<topic>.+?)(?:\s*-\s*|\s*$)')
+_LINK_RE = re.compile(r'http|(?i:youtube)')
+# Substring match, so 'Weekly review' and 'Overviews' are excluded too
+_NON_QUIZ_RE = re.compile(r'week|overview|introduction', re.I)
+
+# Structured-plan section headers
+_OBJECTIVES_HEADER = "**🎯 Learning Objectives:**"
+_TOPICS_HEADER = "**📖 Topics Covered:**"
+_ACTIVITIES_HEADER = "**🛠️ Activities:**"
+_MODULE_RESOURCES_HEADER = "**📚 Resources:**"
+
+def _bullet_block(header, items):
+    """Build one markdown block: a bold header followed by a bullet list"""
+    return header + "\n" + "\n".join(f"- {item}" for item in items)
+
+def _format_resource(resource):
+    """Format one additional-resource entry as a markdown bullet"""
+    res_type = resource.get('type', 'Resource').title()
+    title = resource.get('title', '')
+    url = resource.get('url', '')
+    if url:
+        return f"- **{res_type}:** [{title}]({url})"
+    return f"- **{res_type}: {title}**"
+
+def _iter_word_counts(value):
+    """Yield word counts for the string leaves of a nested plan structure"""
+    if isinstance(value, str):
+        yield len(value.split())
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_word_counts(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_word_counts(item)
+
+@st.cache_data(show_spinner=False)
+def _plan_stats(plan_id, content):
+    """Precompute plan statistics, cached per (plan_id, content)"""
+    # Returns a plain tuple so the cached value stays picklable
+    # Legacy stringified-JSON plans the migration missed are still parsed here
+    plan_obj = _parse_plan_content(content)
+
+    if isinstance(plan_obj, dict):
+        word_count = sum(_iter_word_counts(plan_obj))
+        module_count = len(plan_obj.get('modules', []))
+        resource_count = len(plan_obj.get('resources', []))
+        link_count = 0
+    elif isinstance(plan_obj, str):
+        plan_lines = plan_obj.split('\n')
+        word_count = len(plan_obj.split())
+        module_count = sum(1 for line in plan_lines if line.lstrip().startswith(('*', '-', '•')))
+        resource_count = 0
+        link_count = sum(1 for line in plan_lines if _LINK_RE.search(line))
+    else:
+        word_count = module_count = resource_count = link_count = 0
+
+    return plan_obj, word_count, module_count, resource_count, link_count
+
+def _integration_status(uid):
+    """Shared cached integration status, imported lazily to keep SDK imports off this page"""
+    from utils.integrations import get_cached_integration_status
+    return get_cached_integration_status(uid)
+
+def _nav_button(label, page, button_type="secondary"):
+    """Render a full-width navigation button that switches to the given page"""
+    if st.button(label, type=button_type, use_container_width=True):
+        st.switch_page(page)
+
+@st.fragment
+def _render_module(module, plan_id, i):
+    """Render one module expander; its widgets rerun only this fragment"""
+    # Mutated in place; session_state already holds the reference
+    completed_modules = st.session_state.setdefault(f"completed_{plan_id}", set())
+    module_key = f"{plan_id}_module_{i}"
+    objectives = module.get('objectives')
+    topics = module.get('topics')
+    activities = module.get('activities')
+    resources = module.get('resources')
+    time_estimate = module.get('time_estimate')
+    with st.expander(f"Week {module.get('week', i+1)}: {module.get('title', 'Module')}"):
+        checked = st.checkbox("Mark as complete", value=module_key in completed_modules, key=module_key)
+        if checked:
+            completed_modules.add(module_key)
+        else:
+            completed_modules.discard(module_key)
+        # Module objectives
+        if objectives:
+            st.markdown(_bullet_block(_OBJECTIVES_HEADER, objectives))
+        
+        # Topics covered
+        if topics:
+            st.markdown(_bullet_block(_TOPICS_HEADER, topics))
+            col1, col2 = st.columns([0.85, 0.15], vertical_alignment="bottom")
+            with col1:
+                quiz_topic = st.selectbox("Quiz yourself on:", topics, key=f"quiz_topic_{plan_id}_{i}")
+            with col2:
+                if st.button("📝 Quiz", key=f"quiz_{plan_id}_{i}"):
+                    st.session_state['current_quiz_topic'] = quiz_topic
+                    st.session_state['page'] = 'quiz'
+                    st.switch_page("pages/2_Quiz.py")
+        
+        # Activities
+        if activities:
+            st.markdown(_bullet_block(_ACTIVITIES_HEADER, activities))
+        
+        # Resources
+        if resources:
+            st.markdown(_bullet_block(_MODULE_RESOURCES_HEADER, resources))
+        
+        # Time estimate
+        if time_estimate:
+            st.info(f"⏱️ Estimated time: {time_estimate}")
+
 def display_structured_plan(plan_data, plan_id):
     """Display a structured AI-generated plan"""
+    overview = plan_data.get('overview')
+    duration = plan_data.get('duration')
+    difficulty = plan_data.get('difficulty')
+    modules = plan_data.get('modules') or []
+    milestones = plan_data.get('milestones')
+    resources = plan_data.get('resources')
+    tips = plan_data.get('tips')
     
     # Plan overview
-    if plan_data.get('overview'):
+    if overview:
         st.markdown("### 📋 Overview")
-        st.write(plan_data['overview'])
+        st.write(overview)
     
     # Plan details
     col1, col2, col3 = st.columns(3)
     with col1:
-        if plan_data.get('duration'):
-            st.metric("⏱️ Duration", plan_data['duration'])
+        if duration:
+            st.metric("⏱️ Duration", duration)
     with col2:
-        if plan_data.get('difficulty'):
-            st.metric("📊 Level", plan_data['difficulty'])
+        if difficulty:
+            st.metric("📊 Level", difficulty)
     with col3:
-        module_count = len(plan_data.get('modules', []))
-        st.metric("📚 Modules", module_count)
+        st.metric("📚 Modules", len(modules))
     
     # Learning modules
-    if plan_data.get('modules'):
+    if modules:
         st.markdown("### 📚 Learning Modules")
-        completed_modules = st.session_state.get(f"completed_{plan_id}", set())
-        for i, module in enumerate(plan_data['modules']):
-            module_key = f"{plan_id}_module_{i}"
-            with st.expander(f"Week {module.get('week', i+1)}: {module.get('title', 'Module')}"):
-                checked = st.checkbox("Mark as complete", value=module_key in completed_modules, key=module_key)
-                if checked:
-                    completed_modules.add(module_key)
-                else:
-                    completed_modules.discard(module_key)
-                st.session_state[f"completed_{plan_id}"] = completed_modules
-                # Module objectives
-                if module.get('objectives'):
-                    st.markdown("**🎯 Learning Objectives:**")
-                    for obj in module['objectives']:
-                        st.write(f"- {obj}")
-                
-                # Topics covered
-                if module.get('topics'):
-                    st.markdown("**📖 Topics Covered:**")
-                    for j, topic in enumerate(module['topics']):
-                        col1, col2 = st.columns([0.85, 0.15])
-                        with col1:
-                            st.write(f"• {topic}")
-                        with col2:
-                            if st.button("📝 Quiz", key=f"quiz_{plan_id}_{i}_{j}"):
-                                st.session_state['current_quiz_topic'] = topic
-                                st.session_state['page'] = 'quiz'
-                                st.switch_page("pages/2_Quiz.py")
-                
-                # Activities
-                if module.get('activities'):
-                    st.markdown("**🛠️ Activities:**")
-                    for activity in module['activities']:
-                        st.write(f"• {activity}")
-                
-                # Resources
-                if module.get('resources'):
-                    st.markdown("**📚 Resources:**")
-                    for resource in module['resources']:
-                        st.write(f"• {resource}")
-                
-                # Time estimate
-                if module.get('time_estimate'):
-                    st.info(f"⏱️ Estimated time: {module['time_estimate']}")
+        for i, module in enumerate(modules):
+            _render_module(module, plan_id, i)
     
     # Milestones
-    if plan_data.get('milestones'):
+    if milestones:
         st.markdown("### 🏆 Milestones")
-        for milestone in plan_data['milestones']:
-            with st.container():
-                col1, col2 = st.columns([0.1, 0.9])
-                with col1:
-                    st.write(f"**W{milestone.get('week', '?')}**")
-                with col2:
-                    st.write(f"**{milestone.get('milestone', 'Milestone')}**")
-                    if milestone.get('criteria'):
-                        st.caption(milestone['criteria'])
-                st.markdown("---")
+        df_milestones = pd.DataFrame([
+            {
+                'Week': f"W{milestone.get('week', '?')}",
+                'Milestone': milestone.get('milestone', 'Milestone'),
+                'Criteria': milestone.get('criteria', '')
+            }
+            for milestone in milestones
+        ])
+        st.dataframe(df_milestones, use_container_width=True, hide_index=True)
     
     # Additional resources
-    if plan_data.get('resources'):
+    if resources:
         st.markdown("### 🔗 Additional Resources")
-        for resource in plan_data['resources']:
-            res_type = resource.get('type', 'Resource').title()
-            title = resource.get('title', '')
-            url = resource.get('url', '')
-            if url:
-                st.markdown(f"- **{res_type}: [{title}]({url})")
-            else:
-                st.markdown(f"- **{res_type}: {title}**")
+        st.markdown("\n".join(_format_resource(resource) for resource in resources))
     
     # Tips
-    if plan_data.get('tips'):
+    if tips:
         st.markdown("### 💡 Learning Tips")
-        for tip in plan_data['tips']:
+        for tip in tips:
             st.info(f"💡 {tip}")
 
 def display_text_plan(plan_content, plan_id):
@@ -116,19 +186,22 @@ def display_text_plan(plan_content, plan_id):
         line = line.strip()
         if not line:
             continue
+
+        kind_match = _LINE_KIND_RE.match(line)
+        kind = kind_match.lastgroup if kind_match else None
             
         # Check if line contains actionable content
-        if line.startswith(('*', '-', '•')) and len(line) > 10:
+        if kind == 'bullet' and len(line) > 10:
             # Extract topic from bullet point
-            topic_match = re.search(r'[\*\-•]\s*(.+?)(?:\s*-\s*|\s*$)', line)
+            topic_match = _BULLET_RE.match(line)
             if topic_match:
-                topic = topic_match.group(1).strip()
+                topic = topic_match.group('topic').strip()
                 
                 col1, col2 = st.columns([0.85, 0.15])
                 with col1:
                     st.markdown(line)
                 with col2:
-                    if len(topic) > 5 and not any(word in topic.lower() for word in ['week', 'overview', 'introduction']):
+                    if len(topic) > 5 and not _NON_QUIZ_RE.search(topic):
                         if st.button("📝 Quiz", key=f"quiz_{plan_id}_{i}_{topic[:20]}"):
                             st.session_state['current_quiz_topic'] = topic
                             st.session_state['page'] = 'quiz'
@@ -136,20 +209,12 @@ def display_text_plan(plan_content, plan_id):
             else:
                 st.markdown(line)
         
-        elif line.startswith('#'):
-            # Headers
-            st.markdown(line)
-        
-        elif 'Week' in line and ':' in line:
+        elif kind != 'header' and 'Week' in line and ':' in line:
             # Week headers with special formatting
             st.markdown(f"### {line}")
         
-        elif line.startswith(('http', 'www', '[')) or 'youtube' in line.lower():
-            # Links
-            st.markdown(line)
-        
         else:
-            # Regular content
+            # Headers, links and regular content
             st.markdown(line)
 
 # --- Authentication Check ---
@@ -159,20 +224,27 @@ if not st.session_state.get('logged_in', False):
 
 user_uid = st.session_state.get('user_id')
 user_email = st.session_state.get('user_email', 'User')
+display_name = st.session_state.get('display_name') or get_display_name(user_email)
 
 # --- Header ---
 col1, col2 = st.columns([4, 1])
 with col1:
     st.title("🎓 Your Learning Dashboard")
-    st.markdown(f"Welcome back, **{user_email.split('@')[0].title()}**! Ready to learn something new today?")
+    st.markdown(f"Welcome back, **{display_name}**! Ready to learn something new today?")
 
 with col2:
     st.markdown("### Quick Actions")
-    if st.button("📊 Analytics", type="secondary", use_container_width=True):
-        st.switch_page("pages/3_Analytics.py")
+    _nav_button("📊 Analytics", "pages/3_Analytics.py")
 
 # --- Dashboard Summary Cards ---
-dashboard_data = get_dashboard_summary(user_uid)
+# The db readers are cached and cleared by the plan and quiz writes
+dashboard_data, user_plans = get_dashboard_bundle(user_uid)
+
+# One-time per session: convert legacy stringified-JSON plans to native maps
+if not st.session_state.get('plans_migrated'):
+    migrate_legacy_plans(user_uid, user_plans)
+    st.session_state['plans_migrated'] = True
+
 if dashboard_data:
     st.markdown("### 📈 Your Progress Overview")
     col1, col2, col3, col4 = st.columns(4)
@@ -189,7 +261,7 @@ if dashboard_data:
         st.metric("🔥 Learning Streak", f"{streak} days")
     
     with col4:
-        total_plans = len(get_user_plans(user_uid))
+        total_plans = len(user_plans)
         st.metric("📚 Study Plans", total_plans)
 
     st.markdown("---")
@@ -242,6 +314,7 @@ with st.sidebar:
         
         if submitted:
             if subject and learning_goal:
+                from utils.ai import generate_plan_with_groq
                 with st.spinner("🤖 AI is crafting your personalized learning plan..."):
                     success, plan = generate_plan_with_groq(
                         subject=subject,
@@ -265,24 +338,12 @@ with st.sidebar:
     
     st.markdown("---")
     
-    # Quick Navigation
-    st.markdown("### 🧭 Quick Navigation")
-    if st.button("🧠 Take Quiz", type="secondary", use_container_width=True):
-        st.switch_page("pages/2_Quiz.py")
-    
-    if st.button("📊 View Analytics", type="secondary", use_container_width=True):
-        st.switch_page("pages/3_Analytics.py")
-    
-    st.markdown("---")
-    
     # Account Actions
     st.markdown("### ⚙️ Account")
     if st.button("🚪 Logout", type="secondary", use_container_width=True):
         logout_user()
 
 # --- Main Dashboard Content ---
-user_plans = get_user_plans(user_uid)
-
 if not user_plans:
     # Empty state with call-to-action
     st.markdown("### 🌟 Let's Start Your Learning Journey!")
@@ -321,7 +382,7 @@ else:
     selected_plan_index = st.selectbox(
         "Choose a study plan to view:",
         range(len(plan_titles)),
-        format_func=lambda x: plan_titles[x]
+        format_func=plan_titles.__getitem__
     )
     
     selected_plan = user_plans[selected_plan_index]
@@ -356,19 +417,16 @@ else:
         st.markdown("---")
         
         # --- Plan Display ---
-        if selected_plan_content:
-            plan_obj = selected_plan_content
-            if isinstance(selected_plan_content, str):
-                try:
-                    plan_obj = json.loads(selected_plan_content)
-                except Exception:
-                    plan_obj = selected_plan_content
-            if isinstance(plan_obj, dict):
-                display_structured_plan(plan_obj, selected_plan_id)
-            elif isinstance(plan_obj, str):
-                display_text_plan(plan_obj, selected_plan_id)
-            else:
-                st.error("Invalid plan format")
+        plan_obj, word_count, module_count, resource_count, link_count = _plan_stats(
+            selected_plan_id, selected_plan_content
+        )
+        is_dict = isinstance(plan_obj, dict)
+        if is_dict:
+            display_structured_plan(plan_obj, selected_plan_id)
+        elif isinstance(plan_obj, str):
+            display_text_plan(plan_obj, selected_plan_id)
+        else:
+            st.error("Invalid plan format")
 
         # Plan statistics
         st.markdown("---")
@@ -377,39 +435,25 @@ else:
         col1, col2, col3 = st.columns(3)
         with col1:
             # Handle both structured and text plans for statistics
-            if isinstance(selected_plan_content, dict):
+            if is_dict:
                 # Structured plan - count modules
-                module_count = len(selected_plan_content.get('modules', []))
                 st.metric("📋 Modules/Topics", module_count)
             else:
                 # Text plan - count topics/bullets
-                plan_lines = selected_plan_content.split('\n') if isinstance(selected_plan_content, str) else []
-                topic_count = len([line for line in plan_lines if line.strip().startswith(('*', '-', '•'))])
-                st.metric("📋 Topics Covered", topic_count)
+                st.metric("📋 Topics Covered", module_count)
         
         with col2:
             # Estimate reading time
-            if isinstance(selected_plan_content, dict):
-                # For structured plans, estimate based on content
-                total_text = str(selected_plan_content)
-                word_count = len(total_text.split())
-            else:
-                # For text plans, count words directly
-                word_count = len(selected_plan_content.split()) if isinstance(selected_plan_content, str) else 0
-            
             reading_time = max(1, word_count // 200)  # Average reading speed
             st.metric("⏱️ Est. Reading Time", f"{reading_time} min")
         
         with col3:
             # Count resources/links
-            if isinstance(selected_plan_content, dict):
+            if is_dict:
                 # Structured plan - count resources
-                resource_count = len(selected_plan_content.get('resources', []))
                 st.metric("🔗 Resources", resource_count)
             else:
                 # Text plan - count links
-                plan_lines = selected_plan_content.split('\n') if isinstance(selected_plan_content, str) else []
-                link_count = len([line for line in plan_lines if 'http' in line or 'youtube' in line.lower()])
                 st.metric("🔗 Resources", link_count)
 
 # --- Recent Activity (if user has quiz history) ---
@@ -419,26 +463,27 @@ if dashboard_data and dashboard_data.get('recent_performance'):
     
     recent_quizzes = dashboard_data['recent_performance'][:3]  # Show last 3
     
-    for idx, quiz in enumerate(recent_quizzes):
-        col1, col2, col3 = st.columns([2, 1, 1])
-        
-        with col1:
-            st.write(f"📚 **{quiz['topic']}**")
-        
-        with col2:
-            score = quiz['percentage']
-            if score >= 80:
-                st.success(f"🌟 {score:.0f}%")
-            elif score >= 60:
-                st.info(f"✅ {score:.0f}%")
-            else:
-                st.warning(f"📚 {score:.0f}%")
-        
-        with col3:
-            if st.button("🔄 Retake", key=f"retake_{idx}_{quiz['topic']}"):
-                st.session_state['current_quiz_topic'] = quiz['topic']
-                st.session_state['page'] = 'quiz'
-                st.switch_page("pages/2_Quiz.py")
+    def _score_badge(score):
+        if score >= 80:
+            return f"🌟 {score:.0f}%"
+        elif score >= 60:
+            return f"✅ {score:.0f}%"
+        return f"📚 {score:.0f}%"
+    
+    df_recent = pd.DataFrame([
+        {'Topic': f"📚 {quiz['topic']}", 'Score': _score_badge(quiz['percentage'])}
+        for quiz in recent_quizzes
+    ])
+    st.dataframe(df_recent, use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns([3, 1], vertical_alignment="bottom")
+    with col1:
+        retake_topic = st.selectbox("Retake a quiz:", [quiz['topic'] for quiz in recent_quizzes], key="retake_topic")
+    with col2:
+        if st.button("🔄 Retake", key="retake_quiz", use_container_width=True):
+            st.session_state['current_quiz_topic'] = retake_topic
+            st.session_state['page'] = 'quiz'
+            st.switch_page("pages/2_Quiz.py")
 
 # --- Quick Actions ---
 st.markdown("---")
@@ -447,28 +492,26 @@ st.markdown("### 🚀 Quick Actions")
 action_col1, action_col2, action_col3, action_col4 = st.columns(4)
 
 with action_col1:
-    if st.button("🧠 Take Quiz", type="primary", use_container_width=True):
-        st.switch_page("pages/2_Quiz.py")
+    _nav_button("🧠 Take Quiz", "pages/2_Quiz.py", button_type="primary")
 
 with action_col2:
-    if st.button("📊 View Analytics", type="secondary", use_container_width=True):
-        st.switch_page("pages/3_Analytics.py")
+    _nav_button("📊 View Analytics", "pages/3_Analytics.py")
 
 with action_col3:
-    if st.button("🔗 Integrations", type="secondary", use_container_width=True):
-        st.switch_page("pages/4_Integrations.py")
+    _nav_button("🔗 Integrations", "pages/4_Integrations.py")
 
 with action_col4:
     # Check if any integrations are connected
-    from utils.integrations import get_integration_status
-    integration_status = get_integration_status(st.session_state.user_id)
+    integration_status = _integration_status(user_uid)
     connected_count = sum(1 for status in integration_status.values() if status['connected'])
     
     if connected_count > 0:
         if st.button(f"🔄 Sync ({connected_count})", type="secondary", use_container_width=True):
             from utils.integrations import sync_all_integrations
             with st.spinner("Syncing platforms..."):
-                results = sync_all_integrations(st.session_state.user_id)
+                results = sync_all_integrations(user_uid)
+                from utils.integrations import get_cached_integration_status
+                get_cached_integration_status.clear()
                 success_count = sum(1 for r in results.values() if r['success'])
                 st.success(f"✅ Synced {success_count}/{len(results)} platforms")
     else:
@@ -1,7 +1,16 @@
 import streamlit as st
+import asyncio
 import json
-from utils.ai import generate_quiz_with_groq
-from utils.db import save_quiz_score, get_remediation_resources
+import numpy as np
+from utils.ai import (
+    QUIZ_BATCH_SIZE,
+    stream_quiz_with_groq,
+    agenerate_quiz_with_groq,
+    parse_quiz_content,
+    lookup_cached_quiz,
+    store_cached_quiz
+)
+from utils.db import save_quiz_score
 
 st.set_page_config(page_title="Quiz - AI Learning Coach", page_icon="🧠")
 
@@ -27,18 +36,37 @@ with col2:
 
 if st.button("Generate Quiz", type="primary") and topic:
     with st.spinner("Generating quiz questions..."):
-        success, quiz_data = generate_quiz_with_groq(topic, difficulty, num_questions)
+        cached_quiz = lookup_cached_quiz(topic, difficulty, num_questions)
+        if cached_quiz is not None:
+            success, quiz_data = True, cached_quiz
+        elif num_questions <= QUIZ_BATCH_SIZE:
+            # Stream tokens so progress is visible from the first token
+            try:
+                with st.expander("🤖 Live generation output", expanded=False):
+                    raw_quiz = st.write_stream(stream_quiz_with_groq(topic, difficulty, num_questions))
+                success, quiz_data = parse_quiz_content(raw_quiz)
+            except Exception as e:
+                success, quiz_data = False, str(e)
+        else:
+            # Larger quizzes are split into batches generated concurrently
+            success, quiz_data = asyncio.run(agenerate_quiz_with_groq(topic, difficulty, num_questions))
+        if success and cached_quiz is None:
+            store_cached_quiz(topic, difficulty, num_questions, quiz_data)
         if success:
             # Store the quiz data in session state
             st.session_state['current_quiz'] = quiz_data
             st.session_state['quiz_answers'] = {}
+            st.session_state.pop('quiz_submitted', None)
             st.success("✅ Quiz generated successfully!")
-            st.rerun()
         else:
             st.error(f"Failed to generate quiz: {quiz_data}")
 
-# Display quiz if available
-if 'current_quiz' in st.session_state:
+@st.fragment
+def render_quiz(topic, difficulty):
+    """Render the current quiz; answering and submitting rerun only this fragment"""
+    if 'current_quiz' not in st.session_state:
+        return
+
     quiz_data = st.session_state['current_quiz']
     
     st.markdown("---")
@@ -51,41 +79,39 @@ if 'current_quiz' in st.session_state:
     if questions:
         user_answers = {}
         
-        # Display questions
-        for i, q in enumerate(questions):
-            st.markdown(f"**Question {i+1}:** {q['question']}")
-            
-            # Get user's answer
-            answer_index = st.radio(
-                "Select your answer:",
-                range(len(q['options'])),
-                format_func=lambda x: q['options'][x],
-                key=f"q_{i}"
-            )
-            user_answers[i] = answer_index
-            st.markdown("---")
+        # Display questions; answers inside the form only rerun on submit
+        with st.form("quiz_form"):
+            for i, q in enumerate(questions):
+                user_answers[i] = st.radio(
+                    f"**Question {i+1}:** {q['question']}",
+                    range(len(q['options'])),
+                    format_func=lambda x, q=q: q['options'][x],
+                    key=f"q_{i}"
+                )
+                st.markdown("---")
+            submitted = st.form_submit_button("Submit Quiz", type="primary")
         
         # Submit quiz
-        if st.button("Submit Quiz", type="primary"):
-            score = 0
-            results = []
+        if submitted:
+            # Calculate score with one vectorized compare, then collect results
+            answer_array = np.fromiter((user_answers[i] for i in range(len(questions))), dtype=np.int16, count=len(questions))
+            correct_array = np.fromiter((q['correct_answer'] for q in questions), dtype=np.int16, count=len(questions))
+            correct_mask = answer_array == correct_array
+            score = int(correct_mask.sum())
             
-            # Calculate score and collect results
-            for i, q in enumerate(questions):
-                user_answer = user_answers[i]
-                correct_answer = q['correct_answer']
-                is_correct = user_answer == correct_answer
-                
-                if is_correct:
-                    score += 1
-                
-                results.append({
+            results = [
+                {
                     'question': q['question'],
-                    'user_answer': q['options'][user_answer],
-                    'correct_answer': q['options'][correct_answer],
-                    'is_correct': is_correct,
+                    'user_answer': q['options'][user_answers[i]],
+                    'correct_answer': q['options'][q['correct_answer']],
+                    'is_correct': bool(is_correct),
                     'explanation': q.get('explanation', 'No explanation provided')
-                })
+                }
+                for i, (q, is_correct) in enumerate(zip(questions, correct_mask))
+            ]
+            
+            # Results have been shown, so offer another quiz from here on
+            st.session_state['quiz_submitted'] = True
             
             # Save score to database
             percentage = (score / len(questions)) * 100
@@ -93,7 +119,8 @@ if 'current_quiz' in st.session_state:
                 st.session_state['user_id'], 
                 quiz_data.get('subject', topic), 
                 score, 
-                len(questions)
+                len(questions),
+                results
             )
             
             # Display results
@@ -121,113 +148,31 @@ if 'current_quiz' in st.session_state:
                     st.write(f"**Your Answer:** {result['user_answer']}")
                     st.write(f"**Correct Answer:** {result['correct_answer']}")
                     st.write(f"**Explanation:** {result['explanation']}")
-            
+        
+        # Outside `if submitted:` so the click (which reruns with submitted False) is handled
+        if st.session_state.get('quiz_submitted') and st.button("Take Another Quiz"):
             # Clear quiz from session
-            if st.button("Take Another Quiz"):
-                st.session_state.pop('current_quiz', None)
-                st.session_state.pop('current_quiz_topic', None)
-                st.rerun()
+            st.session_state.pop('current_quiz', None)
+            st.session_state.pop('current_quiz_topic', None)
+            st.session_state.pop('quiz_submitted', None)
+            st.rerun(scope="fragment")
+
+# Display quiz if available
+render_quiz(topic, difficulty)
 
 # Navigation
 st.markdown("---")
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 with col1:
     if st.button("🏠 Back to Dashboard"):
+        st.session_state.pop('current_quiz_topic', None)
         st.switch_page("pages/1_Dashboard.py")
 with col2:
     if st.button("📊 View Analytics"):
         st.switch_page("pages/3_Analytics.py")
-        
-        # Calculate percentage
-        percentage = (score / len(questions)) * 100
-        st.balloons()
-        st.markdown(f"### 🎯 Results: {score}/{len(questions)} ({percentage:.1f}%)")
-        
-        # --- STEP 8: RULE-BASED FEEDBACK SYSTEM ---
-        st.markdown("---")
-        st.subheader("📚 Personalized Learning Recommendations")
-        
-        if percentage < 60:
-            # Low score: Recommend reviewing the entire topic
-            st.error("📖 **Review Recommendation**")
-            st.markdown(f"""
-            Your score indicates you might benefit from reviewing **{st.session_state['quiz_topic']}** more thoroughly.
-            
-            **Suggested Action Plan:**
-            1. 📺 Watch foundational videos on this topic
-            2. 📄 Read comprehensive articles 
-            3. 💡 Practice with simpler exercises
-            4. 🔄 Retake this quiz after studying
-            """)
-            
-            # General topic resources
-            st.markdown("### 🎯 Recommended Resources:")
-            topic_clean = st.session_state['quiz_topic'].replace(' ', '+')
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**📺 Video Tutorial:**")
-                st.markdown(f"[YouTube: {st.session_state['quiz_topic']} Tutorial](https://www.youtube.com/results?search_query={topic_clean}+tutorial)")
-            
-            with col2:
-                st.markdown(f"**📄 Article:**")
-                st.markdown(f"[Google: {st.session_state['quiz_topic']} Guide](https://www.google.com/search?q={topic_clean}+comprehensive+guide)")
-                
-        else:
-            # Good score: Provide targeted remediation for specific wrong answers
-            st.success("🎉 **Great Job!** You passed the quiz!")
-            
-            if incorrect_tags:
-                st.markdown("### 🎯 Targeted Improvement Areas:")
-                st.info("Here are specific resources for the topics you missed:")
-                
-                # Remove duplicates from incorrect_tags
-                unique_tags = list(set(incorrect_tags))
-                
-                for tag in unique_tags:
-                    with st.expander(f"📚 Resources for: {tag.replace('_', ' ').title()}"):
-                        
-                        # Generate specific resources for this tag
-                        tag_topic = f"{st.session_state['quiz_topic']} {tag.replace('_', ' ')}"
-                        tag_clean = tag_topic.replace(' ', '+')
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.markdown("**📺 Focused Video:**")
-                            st.markdown(f"[YouTube: {tag_topic}](https://www.youtube.com/results?search_query={tag_clean}+explained)")
-                        
-                        with col2:
-                            st.markdown("**📄 Detailed Article:**")
-                            st.markdown(f"[Google: {tag_topic}](https://www.google.com/search?q={tag_clean}+detailed+explanation)")
-                        
-                        # Practical suggestion
-                        st.markdown(f"💡 **Quick Tip:** Focus on understanding {tag.replace('_', ' ')} concepts before moving forward.")
-            else:
-                st.success("🌟 **Perfect!** You got all questions right! You're ready for more advanced topics.")
-        
-        # Show detailed review
-        st.markdown("---")
-        st.subheader("📋 Detailed Review:")
-        for i, q in enumerate(questions):
-            if user_answers[i] == q['correct_answer']:
-                st.success(f"**Q{i+1}:** ✅ Correct! ({q['correct_answer']})")
-            else:
-                st.error(f"**Q{i+1}:** ❌ Your answer: {user_answers[i]}, Correct: {q['correct_answer']}")
-                st.info(f"📝 **Topic:** {q.get('tag', 'general').replace('_', ' ').title()}")
-
-# Navigation
-col1, col2 = st.columns(2)
-with col1:
-    if st.button("← Back to Dashboard"):
-        st.session_state['page'] = 'dashboard'
-        if 'current_quiz_topic' in st.session_state:
-            del st.session_state['current_quiz_topic']
-        st.switch_page("pages/1_Dashboard.py")
-
-with col2:
+with col3:
     if st.button("🔄 New Quiz"):
-        if 'current_quiz' in st.session_state:
-            del st.session_state['current_quiz']
-        if 'current_quiz_topic' in st.session_state:
-            del st.session_state['current_quiz_topic']
-        st.rerun()
\ No newline at end of file
+        st.session_state.pop('current_quiz', None)
+        st.session_state.pop('current_quiz_topic', None)
+        st.session_state.pop('quiz_submitted', None)
+        st.rerun()
@@ -1,15 +1,147 @@
 # pages/3_Analytics.py
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-from datetime import datetime, timedelta
-from utils.db import get_user_analytics, get_user_quiz_history, get_user_plans, generate_analytics_pdf, get_integration_data
-from utils.integrations import get_integration_status, sync_all_integrations
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.db import get_user_analytics, get_user_quiz_history, get_user_score_summary, get_user_plans, generate_analytics_pdf
+from utils.integrations import get_cached_integration_status, sync_all_integrations
 
 st.set_page_config(page_title="Analytics - AI Learning Coach", page_icon="📊", layout="wide")
 
+# Quiz fields the analytics views read; anything else in the documents is dropped
+_QUIZ_COLUMNS = ('topic', 'percentage', 'completed_at')
+
+def _load_quiz_dataframe(user_id):
+    """Build the derived analytics columns from the quiz history (served from the db-level cache, cleared on save)"""
+    import pandas as pd
+    import pyarrow as pa
+    quiz_history = get_user_quiz_history(user_id, limit=50)
+    if not quiz_history:
+        return pd.DataFrame()
+    # Columnar load: Arrow-backed strings/numbers, timestamps as regular datetime64
+    table = pa.Table.from_pylist([{column: quiz.get(column) for column in _QUIZ_COLUMNS} for quiz in quiz_history])
+    df = table.to_pandas(types_mapper=lambda t: None if pa.types.is_timestamp(t) else pd.ArrowDtype(t))
+    if 'completed_at' in df.columns:
+        df['completed_at'] = pd.to_datetime(df['completed_at'])
+        df['date'] = df['completed_at'].dt.date
+        df['day_of_week'] = df['completed_at'].dt.day_name()
+    # Difficulty categories based on scores
+    df['difficulty_category'] = pd.cut(
+        df['percentage'].astype(float), 
+        bins=[0, 40, 60, 80, 100], 
+        labels=['Very Hard', 'Hard', 'Medium', 'Easy']
+    )
+    # Categorical keys so groupbys skip string hashing
+    df['topic'] = df['topic'].astype('category')
+    if 'day_of_week' in df.columns:
+        df['day_of_week'] = df['day_of_week'].astype('category')
+    return df
+
+# Figures kept per chart across all users; ttl matches the data readers
+FIGURE_CACHE_MAX_ENTRIES = 100
+
+def _mean_by(df_agg, level):
+    """Roll the consolidated aggregate up to one key, weighting by quiz count"""
+    rolled = df_agg.groupby(level=level)[['pct_sum', 'n']].sum()
+    rolled['mean'] = rolled['pct_sum'] / rolled['n']
+    return rolled
+
+@st.cache_data(ttl=300, max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fig_trend(df_trend):
+    """Build the score trend chart once per distinct data (returned as figure JSON)"""
+    import plotly.express as px
+    fig = px.line(
+        df_trend, 
+        x='date', 
+        y='percentage',
+        title="Quiz Scores Over Time",
+        markers=True,
+        line_shape='spline'
+    )
+    fig.add_hline(y=60, line_dash="dash", line_color="red", annotation_text="Pass Line (60%)")
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Average Score (%)",
+        yaxis_range=[0, 100]
+    )
+    return fig.to_json()
+
+@st.cache_data(ttl=300, max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fig_topics(topic_performance):
+    """Build the per-topic bar chart once per distinct data (returned as figure JSON)"""
+    import plotly.express as px
+    fig = px.bar(
+        topic_performance, 
+        x='Average Score', 
+        y='Topic',
+        orientation='h',
+        title="Average Score by Topic",
+        color='Average Score',
+        color_continuous_scale='RdYlGn'
+    )
+    fig.add_vline(x=60, line_dash="dash", line_color="red", annotation_text="Pass Line")
+    return fig.to_json()
+
+@st.cache_data(ttl=300, max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _fig_difficulty(difficulty_counts):
+    """Build the difficulty pie chart once per distinct data (returned as figure JSON)"""
+    import plotly.express as px
+    fig = px.pie(
+        values=difficulty_counts.values,
+        names=difficulty_counts.index,
+        title="Quiz Difficulty Distribution",
+        color_discrete_map={
+            'Very Hard': '#ff4444',
+            'Hard': '#ff8800', 
+            'Medium': '#ffcc00',
+            'Easy': '#44ff44'
+        }
+    )
+    return fig.to_json()
+
+@st.cache_resource
+def _pdf_pool():
+    """Shared worker pool so PDF reports build off the script thread"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def _build_pdf(ctx, user_id, user_email):
+    """Generate the PDF report in a worker with the page's script context attached"""
+    add_script_run_ctx(ctx=ctx)
+    return generate_analytics_pdf(user_id, user_email)
+
+@st.fragment(run_every=1.0)
+def _pdf_export_status():
+    """Poll the background PDF job; once it finishes, keep its result and rerun without the poller"""
+    future = st.session_state.get('pdf_future')
+    if future is None:
+        return
+    if not future.done():
+        st.info("🔄 Generating your PDF report...")
+        return
+    
+    st.session_state['pdf_result'] = future.result()
+    del st.session_state['pdf_future']
+    st.rerun()
+
+def _pdf_export_result():
+    """Offer the finished PDF report for download, or show why it failed"""
+    pdf_data, error = st.session_state['pdf_result']
+    if pdf_data:
+        # Create download button
+        st.download_button(
+            label="📄 Download PDF Report",
+            data=pdf_data,
+            file_name=f"learning_progress_report_{datetime.now().strftime('%Y%m%d')}.pdf",
+            mime="application/pdf",
+            type="primary"
+        )
+        st.success("✅ PDF report generated successfully!")
+    else:
+        st.error(f"❌ Failed to generate PDF: {error}")
+
 if not st.session_state.get('logged_in', False):
     st.error("Please login first")
     st.stop()
@@ -19,11 +151,11 @@ st.markdown("### Track your progress and identify areas for improvement")
 
 user_id = st.session_state.get('user_id')
 
-# Get user data
-quiz_history = get_user_quiz_history(user_id, limit=50)
+# Get user data (quiz history is converted to a DataFrame for easier analysis)
+df_quizzes = _load_quiz_dataframe(user_id)
 user_plans = get_user_plans(user_id)
 
-if not quiz_history:
+if df_quizzes.empty:
     st.info("📈 Take some quizzes to see your analytics!")
     st.markdown("### 🎯 Get Started:")
     col1, col2 = st.columns(2)
@@ -35,26 +167,35 @@ if not quiz_history:
             st.switch_page("pages/2_Quiz.py")
     st.stop()
 
-# Convert to DataFrame for easier analysis
-df_quizzes = pd.DataFrame(quiz_history)
-if 'completed_at' in df_quizzes.columns:
-    df_quizzes['completed_at'] = pd.to_datetime(df_quizzes['completed_at'])
-    df_quizzes['date'] = df_quizzes['completed_at'].dt.date
+# Plotting is only needed once there is quiz data to chart
+import plotly.graph_objects as go
+
+# Single grouped pass; the per-date/topic/day views below are rolled up from it
+_group_keys = [key for key in ('date', 'topic', 'day_of_week') if key in df_quizzes.columns]
+df_agg = df_quizzes.groupby(_group_keys, observed=True)['percentage'].agg(pct_sum='sum', n='count')
 
 # --- ANALYTICS CARDS ---
 st.markdown("### 📈 Quick Stats")
 col1, col2, col3, col4 = st.columns(4)
 
+# Headline numbers are aggregated server-side over the full history; fall back to the loaded rows
+score_summary = get_user_score_summary(user_id)
+if score_summary and score_summary['total_quizzes']:
+    total_quizzes = score_summary['total_quizzes']
+    avg_score = score_summary['average_score']
+    passed_quizzes = score_summary['passed_quizzes']
+else:
+    total_quizzes = len(df_quizzes)
+    avg_score = df_quizzes['percentage'].mean()
+    passed_quizzes = int((df_quizzes['percentage'] >= 60).sum())
+
 with col1:
-    total_quizzes = len(quiz_history)
     st.metric("🧠 Total Quizzes", total_quizzes)
 
 with col2:
-    avg_score = df_quizzes['percentage'].mean() if not df_quizzes.empty else 0
     st.metric("📊 Average Score", f"{avg_score:.1f}%")
 
 with col3:
-    passed_quizzes = len(df_quizzes[df_quizzes['percentage'] >= 60]) if not df_quizzes.empty else 0
     pass_rate = (passed_quizzes / total_quizzes * 100) if total_quizzes > 0 else 0
     st.metric("✅ Pass Rate", f"{pass_rate:.1f}%")
 
@@ -65,27 +206,13 @@ with col4:
 st.markdown("---")
 
 # --- PERFORMANCE OVER TIME ---
-if len(quiz_history) >= 2:
+if len(df_quizzes) >= 2:
     st.subheader("📈 Performance Trend")
     
     # Prepare data for line chart
-    df_trend = df_quizzes.groupby('date')['percentage'].mean().reset_index()
-    df_trend = df_trend.sort_values('date')
+    df_trend = _mean_by(df_agg, 'date')['mean'].rename('percentage').reset_index()
     
-    fig_trend = px.line(
-        df_trend, 
-        x='date', 
-        y='percentage',
-        title="Quiz Scores Over Time",
-        markers=True,
-        line_shape='spline'
-    )
-    fig_trend.add_hline(y=60, line_dash="dash", line_color="red", annotation_text="Pass Line (60%)")
-    fig_trend.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Average Score (%)",
-        yaxis_range=[0, 100]
-    )
+    fig_trend = go.Figure(json.loads(_fig_trend(df_trend)))
     st.plotly_chart(fig_trend, use_container_width=True)
 else:
     st.info("Take more quizzes to see your performance trend!")
@@ -98,54 +225,27 @@ with col1:
     st.subheader("📚 Performance by Topic")
     
     if not df_quizzes.empty:
-        topic_performance = df_quizzes.groupby('topic')['percentage'].agg(['mean', 'count']).reset_index()
+        topic_performance = _mean_by(df_agg, 'topic')[['mean', 'n']].reset_index()
         topic_performance.columns = ['Topic', 'Average Score', 'Quiz Count']
         topic_performance = topic_performance.sort_values('Average Score', ascending=True)
         
-        fig_topics = px.bar(
-            topic_performance, 
-            x='Average Score', 
-            y='Topic',
-            orientation='h',
-            title="Average Score by Topic",
-            color='Average Score',
-            color_continuous_scale='RdYlGn'
-        )
-        fig_topics.add_vline(x=60, line_dash="dash", line_color="red", annotation_text="Pass Line")
+        fig_topics = go.Figure(json.loads(_fig_topics(topic_performance)))
         st.plotly_chart(fig_topics, use_container_width=True)
         
         # Show topics needing improvement
-        weak_topics = topic_performance[topic_performance['Average Score'] < 70]['Topic'].tolist()
-        if weak_topics:
+        weak_topics = topic_performance[topic_performance['Average Score'] < 70]
+        if not weak_topics.empty:
             st.warning("🎯 **Topics to Focus On:**")
-            for topic in weak_topics[:3]:  # Show top 3 weak topics
-                score = topic_performance[topic_performance['Topic'] == topic]['Average Score'].iloc[0]
+            for topic, score, _ in weak_topics.head(3).itertuples(index=False, name=None):  # Show top 3 weak topics
                 st.write(f"• **{topic}** - {score:.1f}% average")
 
 with col2:
     st.subheader("🎯 Quiz Difficulty Distribution")
     
     if not df_quizzes.empty:
-        # Create difficulty categories based on scores
-        df_quizzes['difficulty_category'] = pd.cut(
-            df_quizzes['percentage'], 
-            bins=[0, 40, 60, 80, 100], 
-            labels=['Very Hard', 'Hard', 'Medium', 'Easy']
-        )
-        
         difficulty_counts = df_quizzes['difficulty_category'].value_counts()
         
-        fig_difficulty = px.pie(
-            values=difficulty_counts.values,
-            names=difficulty_counts.index,
-            title="Quiz Difficulty Distribution",
-            color_discrete_map={
-                'Very Hard': '#ff4444',
-                'Hard': '#ff8800', 
-                'Medium': '#ffcc00',
-                'Easy': '#44ff44'
-            }
-        )
+        fig_difficulty = go.Figure(json.loads(_fig_difficulty(difficulty_counts)))
         st.plotly_chart(fig_difficulty, use_container_width=True)
 
 # --- LEARNING STREAK ---
@@ -157,45 +257,41 @@ col1, col2 = st.columns(2)
 with col1:
     # Calculate learning streak
     if not df_quizzes.empty:
-        recent_dates = df_quizzes['date'].unique()
-        recent_dates = sorted(recent_dates, reverse=True)
+        recent_dates = np.array(sorted(df_quizzes['date'].unique(), reverse=True), dtype='datetime64[D]')
         
-        current_streak = 0
-        yesterday = datetime.now().date() - timedelta(days=1)
-        
-        for date in recent_dates:
-            if date == yesterday or (recent_dates[0] == datetime.now().date() and date == datetime.now().date()):
-                current_streak += 1
-                yesterday -= timedelta(days=1)
-            else:
-                break
+        # Streak runs back from today if studied today, otherwise from yesterday
+        today = np.datetime64(datetime.now().date(), 'D')
+        streak_start = today if recent_dates[0] == today else today - 1
+        gaps = recent_dates != streak_start - np.arange(len(recent_dates))
+        current_streak = int(np.argmax(gaps)) if gaps.any() else len(recent_dates)
         
         st.metric("🔥 Current Streak", f"{current_streak} days")
         
         # Show recent activity
         st.markdown("**📅 Recent Activity:**")
-        recent_activity = df_quizzes.groupby('date').agg({
-            'topic': 'count',
-            'percentage': 'mean'
-        }).reset_index().sort_values('date', ascending=False).head(5)
+        recent_activity = _mean_by(df_agg, 'date').reset_index().sort_values('date', ascending=False).head(5)
         
-        for _, row in recent_activity.iterrows():
-            date_str = row['date'].strftime("%b %d")
-            quizzes_count = int(row['topic'])
-            avg_score = row['percentage']
+        for row in recent_activity[['date', 'n', 'mean']].itertuples(index=False):
+            date_str = row.date.strftime("%b %d")
+            quizzes_count = int(row.n)
+            avg_score = row.mean
             st.write(f"• **{date_str}**: {quizzes_count} quiz{'s' if quizzes_count > 1 else ''} - {avg_score:.1f}% avg")
 
 with col2:
     # Study plans progress
     st.markdown("**📚 Study Plans Progress:**")
     if user_plans:
+        # Per-topic totals come from the shared aggregate, so each plan only scans distinct topic names
+        topic_totals = _mean_by(df_agg, 'topic')
+        topic_names = topic_totals.index.astype(str).str.lower()
         for plan in user_plans[:3]:  # Show first 3 plans
             plan_title = plan.get('goal', 'Untitled Plan')
             # Calculate related quiz performance
-            related_quizzes = df_quizzes[df_quizzes['topic'].str.contains(plan_title.split()[0], case=False, na=False)]
+            keyword = plan_title.split()[0].lower()
+            related_topics = topic_totals[topic_names.str.contains(keyword, regex=False)]
             
-            if not related_quizzes.empty:
-                plan_avg = related_quizzes['percentage'].mean()
+            if related_topics['n'].sum() > 0:
+                plan_avg = related_topics['pct_sum'].sum() / related_topics['n'].sum()
                 st.write(f"• **{plan_title[:30]}{'...' if len(plan_title) > 30 else ''}**")
                 st.progress(plan_avg / 100)
                 st.write(f"  {plan_avg:.1f}% average performance")
@@ -217,9 +313,7 @@ with insights_col1:
     if not df_quizzes.empty:
         # Best performing day
         if 'completed_at' in df_quizzes.columns:
-            df_quizzes['day_of_week'] = df_quizzes['completed_at'].dt.day_name()
-            best_day = df_quizzes.groupby('day_of_week')['percentage'].mean().idxmax()
-            best_day_score = df_quizzes.groupby('day_of_week')['percentage'].mean().max()
+            best_day, best_day_score = _mean_by(df_agg, 'day_of_week')['mean'].agg(['idxmax', 'max'])
             st.write(f"📅 Best study day: **{best_day}** ({best_day_score:.1f}% avg)")
         
         # Improvement trend
@@ -260,7 +354,7 @@ st.markdown("---")
 st.subheader("🔗 External Platform Integrations")
 
 # Check integration status
-integration_status = get_integration_status(user_id)
+integration_status = get_cached_integration_status(user_id)
 connected_platforms = [platform for platform, status in integration_status.items() if status['connected']]
 
 if connected_platforms:
@@ -270,6 +364,7 @@ if connected_platforms:
     if st.button("🔄 Sync All Platforms", type="secondary"):
         with st.spinner("Syncing external platforms..."):
             results = sync_all_integrations(user_id)
+            get_cached_integration_status.clear()
             for platform, result in results.items():
                 if result['success']:
                     st.success(f"✅ {platform.replace('_', ' ').title()}: Synced successfully")
@@ -280,7 +375,6 @@ if connected_platforms:
     integration_col1, integration_col2, integration_col3 = st.columns(3)
     
     if 'github' in connected_platforms:
-        github_data = get_integration_data(user_id, 'github')
         with integration_col1:
             st.metric("🐙 GitHub", "Connected", delta="Coding Activity Tracked")
     
@@ -312,19 +406,11 @@ with col2:
 with col3:
     if st.button("📊 Export Report", type="secondary"):
         user_email = st.session_state.get('user_email', 'user@example.com')
-        
-        with st.spinner("🔄 Generating your PDF report..."):
-            pdf_data, error = generate_analytics_pdf(user_id, user_email)
-            
-            if pdf_data:
-                # Create download button
-                st.download_button(
-                    label="📄 Download PDF Report",
-                    data=pdf_data,
-                    file_name=f"learning_progress_report_{datetime.now().strftime('%Y%m%d')}.pdf",
-                    mime="application/pdf",
-                    type="primary"
-                )
-                st.success("✅ PDF report generated successfully!")
-            else:
-                st.error(f"❌ Failed to generate PDF: {error}")
\ No newline at end of file
+        st.session_state.pop('pdf_result', None)
+        st.session_state['pdf_future'] = _pdf_pool().submit(_build_pdf, get_script_run_ctx(), user_id, user_email)
+    
+    # Only poll while a report is being built
+    if 'pdf_future' in st.session_state:
+        _pdf_export_status()
+    elif 'pdf_result' in st.session_state:
+        _pdf_export_result()
\ No newline at end of file
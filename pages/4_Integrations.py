@@ -5,19 +5,66 @@ Manage GitHub, Google Calendar, and Udemy integrations
 
 import streamlit as st
 import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from utils.auth import require_auth
+from utils.db import get_all_integration_data, delete_integration_data
+
+# Template values from the sample secrets file that mean "not configured"
+_PLACEHOLDERS = frozenset({
+    "",
+    "your_github_personal_access_token_here",
+    "your_google_client_id_here",
+    "your_udemy_client_id_here"
+})
+
+def _integration_data(platform):
+    """Session read-through cache of the signed-in user's integration documents"""
+    cache = st.session_state.get('integration_cache')
+    if not cache or cache['user_id'] != user_id:
+        cache = {'user_id': user_id, 'data': get_all_integration_data(user_id)}
+        st.session_state['integration_cache'] = cache
+    return cache['data'].get(platform)
+
+def _invalidate_integrations():
+    """Drop cached integration state after a connect, disconnect or sync writes to it"""
+    st.session_state.pop('integration_cache', None)
+    get_cached_integration_status.clear()
+
+def _github_activity_with_ctx(ctx, token, username, progress):
+    """Run the cached GitHub activity fetch on a worker thread with the page's script context"""
+    add_script_run_ctx(ctx=ctx)
+    return get_cached_github_activity(token, username, _progress=progress)
+
+@st.cache_resource
+def _api_config_flags():
+    """Probe secrets once per process for which platform API credentials are configured"""
+    secrets = st.secrets
+    return (
+        secrets.get("github_api", {}).get("personal_access_token", "") not in _PLACEHOLDERS,
+        secrets.get("google_calendar_api", {}).get("client_id", "") not in _PLACEHOLDERS,
+        secrets.get("udemy_api", {}).get("client_id", "") not in _PLACEHOLDERS
+    )
+
+# Check authentication
+require_auth()
+
+# Integration clients are only loaded once the user is known to be signed in
 from utils.integrations import (
     GitHubIntegration, 
     GoogleCalendarIntegration, 
     UdemyIntegration,
-    get_integration_status,
+    get_cached_integration_status,
+    get_cached_github_activity,
+    clear_cached_github_activity,
+    get_cached_udemy_courses,
+    get_cached_udemy_analytics,
+    clear_cached_udemy,
+    forget_github_token,
     sync_all_integrations
 )
-from utils.db import get_integration_data, delete_integration_data
-
-# Check authentication
-require_auth()
 
 st.set_page_config(
     page_title="Integrations - AI Learning Coach",
@@ -40,10 +87,7 @@ You need valid API credentials for each platform. No sample data is generated.
 """)
 
 # Check if API keys are configured
-import os
-github_token_configured = bool(st.secrets.get("github_api", {}).get("personal_access_token", "").replace("your_github_personal_access_token_here", ""))
-google_creds_configured = bool(st.secrets.get("google_calendar_api", {}).get("client_id", "").replace("your_google_client_id_here", ""))
-udemy_creds_configured = bool(st.secrets.get("udemy_api", {}).get("client_id", "").replace("your_udemy_client_id_here", ""))
+github_token_configured, google_creds_configured, udemy_creds_configured = _api_config_flags()
 
 # API Status Overview
 st.subheader("🔑 API Configuration Status")
@@ -95,18 +139,24 @@ st.markdown("---")
 
 # Get current integration status
 user_id = st.session_state.user_id
-integration_status = get_integration_status(user_id)
+user_email = st.session_state.get('user_email', '')
+firebase_token = st.session_state.get('firebase_id_token')
+_authed = 'user_id' in st.session_state
+integration_status = get_cached_integration_status(user_id)
 
 # Create tabs for different integrations
 tab1, tab2, tab3, tab4 = st.tabs(["🐙 GitHub", "📅 Google Calendar", "🎓 Udemy", "📊 Dashboard"])
 
 # GitHub Integration Tab
-with tab1:
+@st.fragment
+def _github_tab():
+    """Render the GitHub tab; connecting or disconnecting reruns only this tab"""
+    integration_status = get_cached_integration_status(user_id)
+    
     st.header("GitHub Integration")
     st.write("Track your coding activity and get personalized learning suggestions")
     
     github_connected = integration_status['github']['connected']
-    user_email = st.session_state.get('user_email', '')
     
     if not github_connected:
         st.info("🔗 Connect your GitHub account to track coding activity and get AI-powered learning recommendations!")
@@ -135,108 +185,134 @@ with tab1:
                     if success:
                         st.success(f"✅ Successfully connected to GitHub as {result['login']}")
                         st.success(f"📧 Email verified: {user_email}")
-                        st.rerun()
+                        _invalidate_integrations()
+                        st.rerun(scope="fragment")
                     else:
                         st.error(f"❌ Authentication failed: {result}")
                 else:
                     st.error("Please provide your GitHub token")
     
     else:
-        github_data = get_integration_data(user_id, 'github')
+        github_data = _integration_data('github')
         st.success(f"✅ Connected as **{github_data['username']}**")
         st.success(f"📧 Verified email: **{github_data.get('verified_email', 'N/A')}**")
         
         col1, col2 = st.columns(2)
         
         with col1:
+            force_github_refresh = st.checkbox("Force refresh", key="github_force_refresh",
+                                               help="Skip the 5-minute cache and call the GitHub API again")
             if st.button("🔄 Sync GitHub Activity", type="primary"):
-                with st.spinner("Syncing real-time GitHub activity..."):
-                    github = GitHubIntegration()
-                    success, activity = github.get_real_time_activity(
-                        github_data['token'], 
-                        github_data['username']
+                github = GitHubIntegration()
+                if force_github_refresh:
+                    clear_cached_github_activity(github_data['token'], github_data['username'])
+                
+                # Fetch on a worker thread and report per-repository progress while it runs
+                progress = {'done': 0, 'total': 0}
+                with st.status("Syncing real-time GitHub activity...") as status:
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        future = executor.submit(
+                            _github_activity_with_ctx, get_script_run_ctx(),
+                            github_data['token'], github_data['username'], progress
+                        )
+                        while not future.done():
+                            if progress['total']:
+                                status.update(label=f"Fetched commits for {progress['done']}/{progress['total']} repositories...")
+                            time.sleep(0.2)
+                    success, activity = future.result()
+                    status.update(
+                        label="GitHub sync complete" if success else "GitHub sync failed",
+                        state="complete" if success else "error"
                     )
+                
+                if success:
+                    st.success("✅ Real-time GitHub activity synced successfully!")
                     
-                    if success:
-                        st.success("✅ Real-time GitHub activity synced successfully!")
-                        
-                        # Display comprehensive activity summary
-                        st.subheader("📈 Your GitHub Activity (Last 30 Days)")
-                        
-                        # Main metrics
-                        metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
-                        with metrics_col1:
-                            st.metric("Total Commits", activity['total_commits'])
-                        with metrics_col2:
-                            st.metric("Total Repositories", activity['total_repositories'])
-                        with metrics_col3:
-                            st.metric("Active Repositories", len(activity['active_repos']))
-                        with metrics_col4:
-                            st.metric("Languages Used", len(activity['languages_used']))
-                        
-                        # Languages breakdown
-                        if activity['languages_used']:
-                            st.subheader("💻 Programming Languages")
-                            lang_data = []
-                            for lang, count in activity['languages_used'].items():
-                                lang_data.append({'Language': lang, 'Repositories': count})
-                            
-                            if lang_data:
-                                df_langs = pd.DataFrame(lang_data)
-                                st.dataframe(df_langs, use_container_width=True)
-                                
-                                # Get learning suggestions
-                                suggestions = github.suggest_learning_paths(list(activity['languages_used'].keys()))
-                                if suggestions:
-                                    st.subheader("🎯 AI-Powered Learning Recommendations")
-                                    for i, suggestion in enumerate(suggestions[:5], 1):
-                                        st.write(f"{i}. {suggestion}")
+                    # Display comprehensive activity summary
+                    st.subheader("📈 Your GitHub Activity (Last 30 Days)")
+                    
+                    # Main metrics
+                    metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
+                    with metrics_col1:
+                        st.metric("Total Commits", activity['total_commits'])
+                    with metrics_col2:
+                        st.metric("Total Repositories", activity['total_repositories'])
+                    with metrics_col3:
+                        st.metric("Active Repositories", len(activity['active_repos']))
+                    with metrics_col4:
+                        st.metric("Languages Used", len(activity['languages_used']))
+                    
+                    # Languages breakdown
+                    if activity['languages_used']:
+                        st.subheader("💻 Programming Languages")
+                        df_langs = pd.DataFrame(list(activity['languages_used'].items()), columns=['Language', 'Repositories'])
                         
-                        # Recent commits
-                        if activity['recent_commits']:
-                            st.subheader("📝 Recent Commits")
-                            commits_data = []
-                            for commit in activity['recent_commits'][:10]:
-                                commits_data.append({
-                                    'Repository': commit['repo'],
-                                    'Message': commit['message'],
-                                    'Date': commit['date'][:10],
-                                    'SHA': commit['sha']
-                                })
+                        if not df_langs.empty:
+                            st.dataframe(df_langs, use_container_width=True)
                             
-                            if commits_data:
-                                df_commits = pd.DataFrame(commits_data)
-                                st.dataframe(df_commits, use_container_width=True)
+                            # Get learning suggestions
+                            suggestions = github.suggest_learning_paths(activity['languages_used'])
+                            if suggestions:
+                                st.subheader("🎯 AI-Powered Learning Recommendations")
+                                for i, suggestion in enumerate(suggestions[:5], 1):
+                                    st.write(f"{i}. {suggestion}")
+                    
+                    # Recent commits
+                    if activity['recent_commits']:
+                        st.subheader("📝 Recent Commits")
+                        df_commits = pd.DataFrame(activity['recent_commits'][:10], columns=['repo', 'message', 'date', 'sha'])
+                        # Parse once so the Date column sorts as a date, not a string
+                        df_commits['date'] = pd.to_datetime(df_commits['date']).dt.date
+                        df_commits = df_commits.rename(columns={'repo': 'Repository', 'message': 'Message', 'date': 'Date', 'sha': 'SHA'})
                         
-                        # Repository details
-                        if activity['repository_details']:
-                            with st.expander("📂 Repository Details"):
-                                for repo in activity['repository_details'][:5]:
-                                    col_a, col_b, col_c = st.columns(3)
-                                    with col_a:
-                                        st.write(f"**{repo['name']}**")
-                                        st.write(f"Language: {repo['language'] or 'N/A'}")
-                                    with col_b:
-                                        st.write(f"⭐ {repo['stars']} stars")
-                                        st.write(f"🍴 {repo['forks']} forks")
-                                    with col_c:
-                                        st.write(f"📝 {repo['commits_count']} commits")
-                                        st.write(f"Updated: {repo['last_updated'][:10]}")
-                                    st.markdown("---")
-                                    
-                    else:
-                        st.error(f"❌ Failed to sync: {activity}")
+                        if not df_commits.empty:
+                            st.dataframe(df_commits, use_container_width=True)
+                    
+                    # Repository details
+                    if activity['repository_details']:
+                        with st.expander("📂 Repository Details"):
+                            df_repos = pd.DataFrame(
+                                activity['repository_details'][:5],
+                                columns=['name', 'language', 'stars', 'forks', 'commits_count', 'last_updated']
+                            )
+                            df_repos['language'] = df_repos['language'].fillna('N/A')
+                            df_repos['last_updated'] = df_repos['last_updated'].str[:10]
+                            st.dataframe(
+                                df_repos,
+                                use_container_width=True,
+                                hide_index=True,
+                                column_config={
+                                    'name': 'Repository',
+                                    'language': 'Language',
+                                    'stars': st.column_config.NumberColumn('⭐ Stars'),
+                                    'forks': st.column_config.NumberColumn('🍴 Forks'),
+                                    'commits_count': st.column_config.NumberColumn('📝 Commits'),
+                                    'last_updated': 'Updated'
+                                }
+                            )
+                                
+                else:
+                    st.error(f"❌ Failed to sync: {activity}")
         
         with col2:
             if st.button("🗑️ Disconnect GitHub", type="secondary"):
                 if delete_integration_data(user_id, 'github'):
+                    forget_github_token(github_data['token'])
                     st.success("✅ GitHub disconnected successfully")
-                    st.rerun()
+                    _invalidate_integrations()
+                    st.rerun(scope="fragment")
                 else:
                     st.error("❌ Failed to disconnect GitHub")
 
+with tab1:
+    _github_tab()
+
 # Google Calendar Integration Tab
-with tab2:
+@st.fragment
+def _calendar_tab():
+    """Render the Google Calendar tab; connecting or disconnecting reruns only this tab"""
+    integration_status = get_cached_integration_status(user_id)
+    
     st.header("Google Calendar Integration via Firebase")
     st.write("Schedule study sessions using Firebase Google authentication")
     
@@ -250,15 +326,15 @@ with tab2:
         st.write("If you signed in to this app using your Google account, we can access your Calendar automatically:")
         
         if st.button("🔗 Connect via Firebase Google Auth", type="primary", key="firebase_auth_calendar"):
-            if 'user_id' in st.session_state:
+            if _authed:
                 # Check if user has Firebase ID token
-                firebase_token = st.session_state.get('firebase_id_token')
                 if firebase_token:
                     calendar = GoogleCalendarIntegration()
                     success, message = calendar.authenticate_with_firebase(firebase_token)
                     if success:
                         st.success(f"✅ {message}")
-                        st.rerun()
+                        _invalidate_integrations()
+                        st.rerun(scope="fragment")
                     else:
                         st.error(f"❌ {message}")
                         st.info("💡 Make sure you signed in with Google and granted Calendar permissions")
@@ -290,12 +366,13 @@ with tab2:
             """)
         
         if st.button("🔗 Connect via Firebase Service Account", type="secondary", key="firebase_service_calendar"):
-            if 'user_id' in st.session_state:
+            if _authed:
                 calendar = GoogleCalendarIntegration()
                 success, message = calendar.authenticate_with_firebase_config()
                 if success:
                     st.success(f"✅ {message}")
-                    st.rerun()
+                    _invalidate_integrations()
+                    st.rerun(scope="fragment")
                 else:
                     st.error(f"❌ {message}")
                     st.info("💡 Make sure Calendar API is enabled in your Firebase project's Google Cloud Console")
@@ -332,7 +409,8 @@ with tab2:
                     if success:
                         st.success("✅ Google Calendar connected successfully!")
                         st.success(result)
-                        st.rerun()
+                        _invalidate_integrations()
+                        st.rerun(scope="fragment")
                     else:
                         st.error(f"❌ Connection failed: {result}")
                 else:
@@ -377,9 +455,12 @@ with tab2:
             
             if success and events:
                 for event in events:
+                    # All-day events only carry a date, so there is no time to show
+                    start = pd.Timestamp(event['start_time'])
+                    all_day = len(event['start_time']) <= 10
                     with st.expander(f"📅 {event['title']}"):
-                        st.write(f"**Date:** {event['start_time'][:10]}")
-                        st.write(f"**Time:** {event['start_time'][11:16]}")
+                        st.write(f"**Date:** {start.strftime('%Y-%m-%d')}")
+                        st.write(f"**Time:** {'' if all_day else start.strftime('%H:%M')}")
                         if event['description']:
                             st.write(f"**Description:** {event['description']}")
             else:
@@ -388,17 +469,61 @@ with tab2:
         if st.button("🗑️ Disconnect Google Calendar", type="secondary"):
             if delete_integration_data(user_id, 'google_calendar'):
                 st.success("✅ Google Calendar disconnected successfully")
-                st.rerun()
+                _invalidate_integrations()
+                st.rerun(scope="fragment")
             else:
                 st.error("❌ Failed to disconnect Google Calendar")
 
+with tab2:
+    _calendar_tab()
+
+_COURSES_PER_PAGE = 10
+
+@st.fragment
+def _render_course_page():
+    """Render one page of synced Udemy courses; paging reruns only this list"""
+    courses = st.session_state['udemy_courses']
+    last_page = (len(courses) - 1) // _COURSES_PER_PAGE
+    page = 0
+    if last_page:
+        page = st.number_input("Page", min_value=1, max_value=last_page + 1, value=1, key="udemy_course_page") - 1
+    
+    # Course details
+    for course in courses[page * _COURSES_PER_PAGE:(page + 1) * _COURSES_PER_PAGE]:
+        with st.expander(f"📘 {course['title']} ({course['progress_percentage']}% complete)"):
+            course_col1, course_col2 = st.columns(2)
+            
+            with course_col1:
+                st.write(f"**Instructor:** {course['instructor']}")
+                st.write(f"**Category:** {course['category']}")
+                st.write(f"**Difficulty:** {course['difficulty']}")
+                st.write(f"**Rating:** ⭐ {course['rating']}/5.0")
+            
+            with course_col2:
+                st.write(f"**Status:** {course['status']}")
+                st.write(f"**Enrolled:** {course['enrollment_date']}")
+                st.write(f"**Last Accessed:** {course['last_accessed']}")
+                st.write(f"**Progress:** {course['completed_lectures']}/{course['total_lectures']} lectures")
+            
+            # Progress bar
+            progress_val = course['progress_percentage'] / 100
+            st.progress(progress_val)
+            
+            # Time progress
+            time_spent = course['progress_minutes']
+            total_time = course['total_duration_minutes']
+            st.write(f"⏱️ Time: {time_spent//60}h {time_spent%60}m / {total_time//60}h {total_time%60}m")
+
 # Udemy Integration Tab
-with tab3:
+@st.fragment
+def _udemy_tab():
+    """Render the Udemy tab; connecting or disconnecting reruns only this tab"""
+    integration_status = get_cached_integration_status(user_id)
+    
     st.header("Udemy Integration")
     st.write("Sync your course progress and get personalized recommendations")
     
     udemy_connected = integration_status['udemy']['connected']
-    user_email = st.session_state.get('user_email', '')
     
     if not udemy_connected:
         st.info("🎓 Connect Udemy to track course progress and get AI-powered recommendations!")
@@ -429,24 +554,29 @@ with tab3:
                     if success:
                         st.success("✅ Udemy connected successfully!")
                         st.success(f"📧 Using email: {user_email}")
-                        st.rerun()
+                        clear_cached_udemy(user_id, user_email)
+                        _invalidate_integrations()
+                        st.rerun(scope="fragment")
                     else:
                         st.error(f"❌ Connection failed: {result}")
                 else:
                     st.error("Please provide all required fields")
     
     else:
-        udemy_data = get_integration_data(user_id, 'udemy')
+        udemy_data = _integration_data('udemy')
         st.success(f"✅ Udemy connected")
         st.success(f"📧 Email: **{udemy_data.get('verified_email', user_email)}**")
         
         col1, col2 = st.columns(2)
         
         with col1:
+            force_udemy_refresh = st.checkbox("Force refresh", key="udemy_force_refresh",
+                                              help="Skip the 5-minute cache and call the Udemy API again")
             if st.button("🔄 Sync Course Progress", type="primary"):
                 with st.spinner("Syncing real-time Udemy courses..."):
-                    udemy = UdemyIntegration()
-                    success, courses = udemy.get_real_enrolled_courses(user_email)
+                    if force_udemy_refresh:
+                        clear_cached_udemy(user_id, user_email)
+                    success, courses = get_cached_udemy_courses(user_id, user_email)
                     
                     if success:
                         st.success("✅ Real-time courses synced successfully!")
@@ -455,8 +585,11 @@ with tab3:
                         
                         # Course metrics
                         total_courses = len(courses)
-                        completed = len([c for c in courses if c['progress_percentage'] >= 90])
-                        in_progress = len([c for c in courses if 10 <= c['progress_percentage'] < 90])
+                        completed = in_progress = 0
+                        for course in courses:
+                            progress = course['progress_percentage']
+                            completed += progress >= 90
+                            in_progress += 10 <= progress < 90
                         
                         metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
                         with metrics_col1:
@@ -466,40 +599,19 @@ with tab3:
                         with metrics_col3:
                             st.metric("In Progress", in_progress)
                         
-                        # Course details
-                        for course in courses:
-                            with st.expander(f"📘 {course['title']} ({course['progress_percentage']}% complete)"):
-                                course_col1, course_col2 = st.columns(2)
-                                
-                                with course_col1:
-                                    st.write(f"**Instructor:** {course['instructor']}")
-                                    st.write(f"**Category:** {course['category']}")
-                                    st.write(f"**Difficulty:** {course['difficulty']}")
-                                    st.write(f"**Rating:** ⭐ {course['rating']}/5.0")
-                                
-                                with course_col2:
-                                    st.write(f"**Status:** {course['status']}")
-                                    st.write(f"**Enrolled:** {course['enrollment_date']}")
-                                    st.write(f"**Last Accessed:** {course['last_accessed']}")
-                                    st.write(f"**Progress:** {course['completed_lectures']}/{course['total_lectures']} lectures")
-                                
-                                # Progress bar
-                                progress_val = course['progress_percentage'] / 100
-                                st.progress(progress_val)
-                                
-                                # Time progress
-                                time_spent = course['progress_minutes']
-                                total_time = course['total_duration_minutes']
-                                st.write(f"⏱️ Time: {time_spent//60}h {time_spent%60}m / {total_time//60}h {total_time%60}m")
+                        # Keep the synced list so paging through it survives reruns
+                        st.session_state['udemy_courses'] = courses
                     
                     else:
                         st.error(f"❌ Failed to sync: {courses}")
+            
+            if st.session_state.get('udemy_courses'):
+                _render_course_page()
         
         with col2:
             st.subheader("📊 Detailed Analytics")
             
-            udemy = UdemyIntegration()
-            success, analytics = udemy.get_detailed_analytics(user_email)
+            success, analytics = get_cached_udemy_analytics(user_id, user_email)
             
             if success:
                 # Main analytics
@@ -515,15 +627,12 @@ with tab3:
                 # Category breakdown
                 if analytics['categories']:
                     st.subheader("📊 Progress by Category")
-                    cat_data = []
-                    for cat, data in analytics['categories'].items():
-                        cat_data.append({
-                            'Category': cat,
-                            'Courses': data['count'],
-                            'Avg Progress': f"{data['avg_progress']:.1f}%"
-                        })
-                    
-                    df_categories = pd.DataFrame(cat_data)
+                    categories = analytics['categories']
+                    df_categories = pd.DataFrame({
+                        'Category': list(categories),
+                        'Courses': [data['count'] for data in categories.values()],
+                        'Avg Progress': [f"{data['avg_progress']:.1f}%" for data in categories.values()]
+                    })
                     st.dataframe(df_categories, use_container_width=True)
                 
                 # Courses needing attention
@@ -542,29 +651,30 @@ with tab3:
         if st.button("🗑️ Disconnect Udemy", type="secondary"):
             if delete_integration_data(user_id, 'udemy'):
                 st.success("✅ Udemy disconnected successfully")
-                st.rerun()
+                st.session_state.pop('udemy_courses', None)
+                clear_cached_udemy(user_id, user_email)
+                _invalidate_integrations()
+                st.rerun(scope="fragment")
             else:
                 st.error("❌ Failed to disconnect Udemy")
 
+with tab3:
+    _udemy_tab()
+
 # Dashboard Tab
 with tab4:
     st.header("🔗 Integration Dashboard")
     st.write("Comprehensive overview of your learning journey across all platforms")
     
-    user_email = st.session_state.get('user_email', '')
     
     # Connection Status Overview
     st.subheader("📊 Connection Status")
     
-    status_data = []
-    for platform, status in integration_status.items():
-        status_data.append({
-            'Platform': platform.replace('_', ' ').title(),
-            'Status': '✅ Connected' if status['connected'] else '❌ Not Connected',
-            'Last Sync': status['last_sync'] or 'Never'
-        })
-    
-    status_df = pd.DataFrame(status_data)
+    status_df = pd.DataFrame({
+        'Platform': [platform.replace('_', ' ').title() for platform in integration_status],
+        'Status': ['✅ Connected' if status['connected'] else '❌ Not Connected' for status in integration_status.values()],
+        'Last Sync': [status['last_sync'] or 'Never' for status in integration_status.values()]
+    })
     st.dataframe(status_df, use_container_width=True)
     
     # Comprehensive Learning Insights
@@ -632,11 +742,10 @@ with tab4:
                 if insights['recommendations']:
                     st.subheader("🤖 AI-Powered Recommendations")
                     
-                    for i, rec in enumerate(insights['recommendations'], 1):
-                        with st.container():
-                            st.write(f"**{i}. {rec['title']}**")
-                            st.write(f"💡 {rec['reason']}")
-                            st.markdown("---")
+                    st.markdown("\n\n---\n\n".join(
+                        f"**{i}. {rec['title']}**\n\n💡 {rec['reason']}"
+                        for i, rec in enumerate(insights['recommendations'], 1)
+                    ) + "\n\n---")
                 
                 # Cross-platform Learning Map
                 st.subheader("🗺️ Your Learning Map")
@@ -655,36 +764,50 @@ with tab4:
                     
                     with map_col1:
                         st.markdown("**🔨 Technical Skills (GitHub)**")
-                        for lang in insights['github']['languages'][:5]:
-                            st.write(f"• {lang}")
+                        # Trailing double spaces force a line break per bullet in one markdown delta
+                        st.markdown("  \n".join(f"• {lang}" for lang in insights['github']['languages'][:5]))
                     
                     with map_col2:
                         st.markdown("**📚 Learning Areas (Udemy)**")
-                        for cat in insights['udemy']['categories'][:5]:
-                            st.write(f"• {cat}")
+                        st.markdown("  \n".join(f"• {cat}" for cat in insights['udemy']['categories'][:5]))
                 
             else:
                 st.error(f"❌ Failed to generate insights: {insights}")
     
     # Sync All Integrations
     if st.button("🔄 Sync All Connected Platforms", type="secondary"):
-        with st.spinner("Syncing all platforms..."):
-            results = sync_all_integrations(user_id)
+        with st.status("Syncing all platforms...", expanded=False) as sync_status:
+            def _report_platform(platform, result):
+                outcome = "synced" if result['success'] else "failed"
+                sync_status.update(label=f"{platform.replace('_', ' ').title()} {outcome}...")
+                sync_status.write(f"{'✅' if result['success'] else '❌'} {platform.replace('_', ' ').title()}")
             
-            st.subheader("🔄 Sync Results")
-            for platform, result in results.items():
-                if result['success']:
-                    st.success(f"✅ {platform.replace('_', ' ').title()}: Synced successfully")
-                    
-                    # Show quick preview of data
-                    if result['data'] and platform == 'github':
-                        data = result['data']
-                        st.write(f"   📊 {data['total_commits']} commits, {len(data['languages_used'])} languages")
-                    elif result['data'] and platform == 'udemy':
-                        data = result['data']
-                        st.write(f"   📚 {data['completion_rate']}% completion rate, {data['total_courses']} courses")
-                else:
-                    st.error(f"❌ {platform.replace('_', ' ').title()}: Sync failed")
+            results = sync_all_integrations(user_id, on_platform_done=_report_platform)
+            _invalidate_integrations()
+            sync_status.update(label="Sync finished", state="complete")
+        
+        st.subheader("🔄 Sync Results")
+        sync_rows = []
+        failed_platforms = []
+        for platform, result in results.items():
+            title = platform.replace('_', ' ').title()
+            if not result['success']:
+                failed_platforms.append(title)
+                continue
+            
+            # Quick preview of the synced data
+            data = result['data']
+            details = ""
+            if data and platform == 'github':
+                details = f"📊 {data['total_commits']} commits, {len(data['languages_used'])} languages"
+            elif data and platform == 'udemy':
+                details = f"📚 {data['completion_rate']}% completion rate, {data['total_courses']} courses"
+            sync_rows.append({'Platform': title, 'Status': '✅ Synced', 'Details': details})
+        
+        if sync_rows:
+            st.dataframe(pd.DataFrame.from_records(sync_rows), hide_index=True, use_container_width=True)
+        if failed_platforms:
+            st.error(f"❌ Sync failed: {', '.join(failed_platforms)}")
     
     # Integration Benefits
     st.subheader("🌟 Why Connect These Platforms?")
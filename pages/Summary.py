@@ -1,42 +1,155 @@
+import asyncio
+import logging
+import hashlib
+import re
 import validators
 import streamlit as st
 from langchain.prompts import PromptTemplate
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_groq import ChatGroq
-from langchain.chains.summarize import load_summarize_chain
-from langchain_community.document_loaders import YoutubeLoader, UnstructuredURLLoader
-import traceback
-import pkg_resources
+from langchain_core.output_parsers import StrOutputParser
+from langchain_community.document_loaders import UnstructuredURLLoader
+from langchain_core.documents import Document
+from youtube_transcript_api import YouTubeTranscriptApi
+from utils.youtube import get_video_id
 
 st.set_page_config(page_title="LangChain: Summarize Text From YT or Website", page_icon="🦜")
 st.title("🦜 LangChain: Summarize Text From YT or Website")
-
-# Check pytube version
-try:
-    pytube_version = pkg_resources.get_distribution("pytube").version
-    st.info(f"pytube version: {pytube_version}")
-    # Recommend upgrade if version is below 15.0.0 (latest as of 2024)
-    from packaging import version
-    if version.parse(pytube_version) < version.parse("15.0.0"):
-        st.warning("Your pytube version is outdated. Please run 'pip install --upgrade pytube' to avoid YouTube errors.")
-except Exception:
-    st.warning("Could not determine pytube version. If you encounter YouTube errors, try upgrading pytube.")
 st.subheader('Summarize URL')
 
+logger = logging.getLogger(__name__)
+
+def show_debug_traceback():
+    """Show the current traceback only when DEBUG is enabled in secrets"""
+    if st.secrets.get("DEBUG"):
+        import traceback
+        st.code(traceback.format_exc())
+
 # Load Groq API key
 groq_api_key = st.secrets.get("GROQ_API_KEY", "").strip()
 generic_url = st.text_input("URL", label_visibility="collapsed")
 
+@st.cache_resource
+def get_llm(api_key):
+    """Build the chat model once per API key"""
+    return ChatGroq(model="llama-3.1-8b-instant", groq_api_key=api_key)
+
 # Initialize LLM if API key exists
 llm = None
 if groq_api_key:
-    llm = ChatGroq(model="llama-3.1-8b-instant", groq_api_key=groq_api_key)
+    llm = get_llm(groq_api_key)
+
+# URLs routed to the YouTube transcript loader
+_YT_RE = re.compile(r'(?:youtube\.com|youtu\.be)', re.I)
 
-# Prompt template
-prompt_template = """
-Provide a summary of the following content in 300 words:
+@st.cache_resource
+def get_prompts():
+    """Build the map, combine and refine prompts once per process"""
+    # Each chunk is summarized on its own, then the partial summaries are combined
+    map_prompt_template = """
+Write a concise summary of the following part of a larger document:
+Content:{text}
+"""
+    combine_prompt_template = """
+Combine the following partial summaries into a single summary of 300 words:
 Content:{text}
 """
-prompt = PromptTemplate(template=prompt_template, input_variables=["text"])
+    refine_prompt_template = """
+Refine the summary given new content. Keep it to about 300 words.
+<current>
+{existing_summary}
+</current>
+<new>
+{text}
+</new>
+"""
+    return (
+        PromptTemplate(template=map_prompt_template, input_variables=["text"]),
+        PromptTemplate(template=combine_prompt_template, input_variables=["text"]),
+        PromptTemplate(template=refine_prompt_template, input_variables=["existing_summary", "text"]),
+    )
+
+# Upper bound on concurrent map calls so long documents don't trip Groq rate limits
+MAX_CONCURRENT_SUMMARIES = 8
+
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=4000, chunk_overlap=200)
+
+
+# Transcripts don't change, so keep them across app restarts
+@st.cache_data(show_spinner=False, persist="disk")
+def load_youtube_docs(url):
+    """Load a YouTube video's transcript and metadata as documents"""
+    video_id = get_video_id(url)
+    transcript = YouTubeTranscriptApi.get_transcript(video_id)
+    metadata = {"source": video_id}
+    try:
+        # yt-dlp is optional; it only adds the title and description
+        import yt_dlp
+        with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+        metadata.update(title=info.get('title', ''), description=info.get('description', ''))
+    except ImportError:
+        pass
+    except Exception:
+        logger.warning("Could not fetch video metadata for %s", url, exc_info=True)
+    return [Document(page_content=" ".join(line["text"] for line in transcript), metadata=metadata)]
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def load_web_docs(url):
+    """Load a web page's content as documents"""
+    loader = UnstructuredURLLoader(
+        urls=[url],
+        ssl_verify=False,
+        headers={"User-Agent": "Mozilla/5.0"}
+    )
+    return loader.load()
+
+
+def get_cached_splits(url, docs):
+    """Split documents into chunks, reusing the splits already computed for this URL"""
+    url_key = hashlib.sha256(url.encode()).hexdigest()
+    splits_cache = st.session_state.setdefault('summary_splits', {})
+    if url_key not in splits_cache:
+        splits_cache[url_key] = text_splitter.split_documents(docs)
+    return splits_cache[url_key]
+
+
+async def map_reduce_inputs(splits):
+    """Summarize each chunk concurrently; returns the final (chain, inputs) step to stream"""
+    map_prompt, combine_prompt, _ = get_prompts()
+    parser = StrOutputParser()
+    if len(splits) == 1:
+        return map_prompt | llm | parser, {"text": splits[0].page_content}
+    map_chain = map_prompt | llm | parser
+    partial_summaries = await map_chain.abatch(
+        [{"text": doc.page_content} for doc in splits],
+        config={"max_concurrency": MAX_CONCURRENT_SUMMARIES}
+    )
+    return combine_prompt | llm | parser, {"text": "\n\n".join(partial_summaries)}
+
+async def refine_inputs(splits, batch_size):
+    """Run the refine loop with batch_size chunks per call; returns the final (chain, inputs) step to stream"""
+    map_prompt, _, refine_prompt = get_prompts()
+    parser = StrOutputParser()
+    refine_chain = refine_prompt | llm | parser
+    final_step = (map_prompt | llm | parser, {"text": splits[0].page_content})
+    for i in range(1, len(splits), batch_size):
+        chain, inputs = final_step
+        summary = await chain.ainvoke(inputs)
+        batch_joined = "\n\n".join(doc.page_content for doc in splits[i:i + batch_size])
+        final_step = (refine_chain, {"existing_summary": summary, "text": batch_joined})
+    return final_step
+
+
+strategy = st.radio(
+    "Summarization strategy",
+    ["Map-reduce (parallel)", "Batch refine (sequential)"],
+    horizontal=True
+)
+refine_batch_size = 3
+if strategy.startswith("Batch refine"):
+    refine_batch_size = st.slider("Chunks per refine step", 1, 6, 3)
 
 if st.button("Summarize the Content from YT or Website"):
     # Basic checks
@@ -50,43 +163,46 @@ if st.button("Summarize the Content from YT or Website"):
         docs = []
         try:
             with st.spinner("Loading content..."):
-                if "youtube.com" in generic_url or "youtu.be" in generic_url:
+                if _YT_RE.search(generic_url):
                     try:
-                        loader = YoutubeLoader.from_youtube_url(generic_url, add_video_info=True)
-                        docs = loader.load()
-                    except Exception as yt_err:
+                        docs = load_youtube_docs(generic_url)
+                    except Exception:
+                        logger.exception("Failed to load YouTube video %s", generic_url)
                         st.error(
-                            "Failed to load YouTube video. It may be private, removed, age-restricted, or pytube needs updating."
+                            "Failed to load YouTube video. It may be private, removed, age-restricted, or have no transcript."
                         )
-                        st.text(traceback.format_exc())
+                        show_debug_traceback()
                 else:
                     try:
-                        loader = UnstructuredURLLoader(
-                            urls=[generic_url],
-                            ssl_verify=False,
-                            headers={"User-Agent": "Mozilla/5.0"}
-                        )
-                        docs = loader.load()
-                    except Exception as web_err:
+                        docs = load_web_docs(generic_url)
+                    except Exception:
+                        logger.exception("Failed to load website %s", generic_url)
                         st.error("Failed to load website content.")
-                        st.text(traceback.format_exc())
+                        show_debug_traceback()
 
-            if not docs or not any(getattr(doc, 'page_content', None) for doc in docs):
+            first_doc = next((doc for doc in docs if getattr(doc, 'page_content', None)), None)
+            if first_doc is None:
                 st.error("No content could be loaded from the provided URL. Please check the link.")
             else:
                 st.write(f"Loaded {len(docs)} document(s). Preview of first doc:")
-                st.write(docs[0].page_content[:500])  # show first 500 chars
+                st.write(first_doc.page_content[:500])  # show first 500 chars
 
                 try:
-                    with st.spinner("Generating summary..."):
-                        chain = load_summarize_chain(llm, chain_type="stuff", prompt=prompt)
-                        output_summary = chain.run(docs)
-                        st.success("Summary generated:")
-                        st.write(output_summary)
-                except Exception as llm_err:
-                    st.error("Error during summarization (Groq LLM):")
-                    st.text(traceback.format_exc())
-
-        except Exception as e:
-            st.error("Unexpected error while processing the URL:")
-            st.text(traceback.format_exc())
+                    with st.spinner("Summarizing sections..."):
+                        splits = get_cached_splits(generic_url, docs)
+                        if strategy.startswith("Batch refine"):
+                            final_chain, final_inputs = asyncio.run(refine_inputs(splits, refine_batch_size))
+                        else:
+                            final_chain, final_inputs = asyncio.run(map_reduce_inputs(splits))
+                    # Stream the final step so the summary appears as it is generated
+                    st.success("Summary:")
+                    output_summary = st.write_stream(final_chain.stream(final_inputs))
+                except Exception:
+                    logger.exception("Summarization failed for %s", generic_url)
+                    st.error("Error during summarization (Groq LLM).")
+                    show_debug_traceback()
+
+        except Exception:
+            logger.exception("Unexpected error while processing %s", generic_url)
+            st.error("Unexpected error while processing the URL.")
+            show_debug_traceback()
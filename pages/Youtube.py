@@ -1,12 +1,24 @@
+import asyncio
+import logging
+import os
 import streamlit as st
-from youtube_transcript_api import YouTubeTranscriptApi
+from concurrent.futures import ThreadPoolExecutor
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
 from rpunct import RestorePuncts
-from groq import Groq
-import traceback
+from utils.youtube import get_video_id
+from utils.clients import get_groq
 
 st.set_page_config(page_title="Summarize YouTube Videos", page_icon="🎥")
 st.title("🎥 Summarize YouTube Videos with Groq LLaMA")
 
+logger = logging.getLogger(__name__)
+
+def show_debug_traceback():
+    """Show the current traceback only when DEBUG is enabled in secrets"""
+    if st.secrets.get("DEBUG"):
+        import traceback
+        st.code(traceback.format_exc())
+
 # Load Groq API key
 groq_api_key = st.secrets.get("GROQ_API_KEY", "").strip()
 if not groq_api_key:
@@ -14,66 +26,153 @@ if not groq_api_key:
     st.stop()
 
 # Initialize Groq client
-client = Groq(api_key=groq_api_key)
-
-# Function to extract video_id
-def get_video_id(url_link: str) -> str:
-    if "watch?v=" in url_link:
-        return url_link.split("watch?v=")[-1].split("&")[0]
-    elif "youtu.be/" in url_link:
-        return url_link.split("youtu.be/")[-1].split("?")[0]
-    elif "embed/" in url_link:
-        return url_link.split("embed/")[-1].split("?")[0]
-    return url_link
-
-# Function to check if transcript is available
-def check_transcript_availability(video_id: str) -> bool:
+client = get_groq()
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _list_langs(video_id: str) -> list:
+    """Language codes of the transcripts available for a video"""
+    return [t.language_code for t in YouTubeTranscriptApi.list_transcripts(video_id)]
+
+# Number of transcript slices punctuated in parallel
+PUNCTUATION_WORKERS = 4
+
+@st.cache_resource(show_spinner=False)
+def get_rpunct():
+    """Load the punctuation model once per process, on the GPU when one is available"""
+    import torch
+    use_cuda = torch.cuda.is_available()
+    if not use_cuda:
+        # Split the CPU cores between the parallel punctuation workers instead of oversubscribing
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // PUNCTUATION_WORKERS))
     try:
-        # List available transcripts
-        transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-        available_languages = [t.language_code for t in transcripts]
-        print(f"Available transcripts for video ID {video_id}: {available_languages}")
-        
-        if not available_languages:
-            st.error("No transcripts available for this video.")
-            return False
-        
-        # Check if English transcript is available
-        if 'en' in available_languages:
-            return True
-        else:
-            st.error("No English transcript available. Available languages: " + ", ".join(available_languages))
-            return False
-    except Exception as e:
-        st.error(f"Error checking transcript availability: {e}")
-        st.text(traceback.format_exc())
-        return False
+        return RestorePuncts(use_cuda=use_cuda)
+    except TypeError:
+        # Older rpunct releases don't take use_cuda
+        return RestorePuncts()
+
+# Bump when the punctuation model changes so persisted transcripts are recomputed
+PUNCTUATION_MODEL_VERSION = "v1"
+
+# Persisted to disk so punctuated transcripts survive app restarts (persist ignores ttl)
+@st.cache_data(show_spinner=False, persist="disk")
+def _fetch_transcript(video_id: str, model_version: str = PUNCTUATION_MODEL_VERSION) -> str:
+    """Fetch the English transcript (or the first available one) and restore its punctuation"""
+    try:
+        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
+    except NoTranscriptFound:
+        available_languages = _list_langs(video_id)
+        logger.info("No English transcript for video ID %s; available: %s", video_id, available_languages)
+        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=available_languages[:1])
+    logger.info("Transcript fetched successfully for video ID: %s", video_id)
+    # Slice the lines in timestamp order and restore punctuation on each slice in parallel;
+    # map() yields results in slice order, so the text is reassembled in sequence
+    slice_size = max(1, -(-len(transcript) // PUNCTUATION_WORKERS))
+    slices = [
+        " ".join(line["text"] for line in transcript[i:i + slice_size])
+        for i in range(0, len(transcript), slice_size)
+    ]
+    rpunct = get_rpunct()
+    with ThreadPoolExecutor(max_workers=PUNCTUATION_WORKERS) as executor:
+        return " ".join(executor.map(rpunct.punctuate, slices))
 
 # Function to load transcript and restore punctuation
 def load_youtube_transcript(video_url: str):
     try:
         video_id = get_video_id(video_url)
-        print(f"Fetching transcript for video ID: {video_id}")
-        
-        if not check_transcript_availability(video_id):
-            return None
-
-        # Fetch the transcript in English if available
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-        print(f"Transcript fetched successfully for video ID: {video_id}")
-        transcript_text = " ".join([line["text"] for line in transcript])
-
-        # Restore punctuation
-        rpunct = RestorePuncts()
-        results = rpunct.punctuate(transcript_text)
-        return results
-    except Exception as e:
-        st.error(f"Failed to fetch transcript: {e}")
-        st.text(traceback.format_exc())
+        logger.info("Fetching transcript for video ID: %s", video_id)
+        return _fetch_transcript(video_id)
+    except Exception:
+        logger.exception("Failed to fetch transcript for %s", video_url)
+        st.error("Failed to fetch transcript. The video may be private, removed, or have no captions.")
+        show_debug_traceback()
         return None
 
+# Upper bound on concurrent chunk summaries so long videos don't trip Groq rate limits
+MAX_CONCURRENT_SUMMARIES = 8
+
+# Characters per transcript chunk fed to the refine loop
+TRANSCRIPT_CHUNK_CHARS = 3000
+
+def split_transcript(text: str, chunk_chars: int = TRANSCRIPT_CHUNK_CHARS) -> list:
+    """Split transcript text into chunks of roughly chunk_chars, breaking on spaces"""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            if space > start:
+                end = space
+        chunks.append(text[start:end].strip())
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+def _completion_kwargs(prompt: str) -> dict:
+    return dict(
+        messages=[
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        model="llama-3.1-8b-instant",
+        temperature=1,
+        max_tokens=512,
+        top_p=1,
+        frequency_penalty=0,
+        presence_penalty=0
+    )
+
+def complete(prompt: str) -> str:
+    """Send a single user prompt to Groq and return the reply text"""
+    completion = client.chat.completions.create(**_completion_kwargs(prompt))
+    return completion.choices[0].message.content
+
+def stream_completion(prompt: str):
+    """Yield reply tokens for a single user prompt as Groq produces them"""
+    stream = client.chat.completions.create(**_completion_kwargs(prompt), stream=True)
+    return (chunk.choices[0].delta.content or "" for chunk in stream)
+
+def refine_summary_prompt(transcript: str, batch_size: int) -> str:
+    """Run the refine loop over batch_size chunks per call and return the prompt for its final step"""
+    chunks = split_transcript(transcript)
+    prompt = f"Summarize the following text in 300 words:\n\n{chunks[0]}"
+    for i in range(1, len(chunks), batch_size):
+        evolving_summary = complete(prompt)
+        batch_joined = "\n\n".join(chunks[i:i + batch_size])
+        prompt = (
+            "Refine the summary given new content. Keep it to about 300 words.\n"
+            f"<current>\n{evolving_summary}\n</current>\n<new>\n{batch_joined}\n</new>"
+        )
+    return prompt
+
+async def parallel_summary_prompt(transcript: str) -> str:
+    """Summarize every chunk concurrently and return the prompt that combines them"""
+    chunks = split_transcript(transcript)
+    if len(chunks) == 1:
+        return f"Summarize the following text in 300 words:\n\n{chunks[0]}"
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SUMMARIES)
+    
+    async def summarize(chunk):
+        async with semaphore:
+            return await asyncio.to_thread(complete, f"Summarize the following part of a video transcript:\n\n{chunk}")
+    
+    partial_summaries = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+    return (
+        "Combine the following partial summaries into a single summary of 300 words:\n\n"
+        + "\n\n".join(partial_summaries)
+    )
+
 # UI input
 video_url = st.text_input("Enter YouTube Video URL")
+strategy = st.radio(
+    "Summarization strategy",
+    ["Parallel (map-reduce)", "Batch refine (sequential)"],
+    horizontal=True
+)
+batch_size = 3
+if strategy.startswith("Batch refine"):
+    batch_size = st.slider("Transcript chunks per refine step", 1, 6, 3)
 
 if st.button("Summarize"):
     if not video_url.strip():
@@ -86,26 +185,17 @@ if st.button("Summarize"):
             st.success("Transcript loaded successfully. Generating summary...")
 
             try:
-                # Call Groq LLM directly (no LangChain)
-                completion = client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"Summarize the following text in 300 words:\n\n{transcript}"
-                        }
-                    ],
-                    model="llama-3.1-8b-instant",
-                    temperature=1,
-                    max_tokens=512,
-                    top_p=1,
-                    frequency_penalty=0,
-                    presence_penalty=0
-                )
-
-                summary = completion.choices[0].message.content
+                # Call Groq LLM directly (no LangChain); intermediate steps run first,
+                # then the final summary streams in token by token
+                with st.spinner("Summarizing transcript sections..."):
+                    if strategy.startswith("Batch refine"):
+                        final_prompt = refine_summary_prompt(transcript, batch_size)
+                    else:
+                        final_prompt = asyncio.run(parallel_summary_prompt(transcript))
                 st.subheader("Generated Summary")
-                st.write(summary)
+                summary = st.write_stream(stream_completion(final_prompt))
 
-            except Exception as e:
+            except Exception:
+                logger.exception("Summarization failed for %s", video_url)
                 st.error("Error during summarization with Groq LLM")
-                st.text(traceback.format_exc())
\ No newline at end of file
+                show_debug_traceback()
\ No newline at end of file
@@ -1,14 +1,25 @@
 import streamlit as st
-from groq import Groq
+from groq import AsyncGroq
+import asyncio
+import copy
+import difflib
 import json
+import random
 import re
+import threading
+import time
+from utils.clients import get_groq
 from utils.db import get_remediation_resources
 
-def generate_plan_with_groq(subject, learning_goal, current_level, time_commitment, additional_context=""):
-    try:
-        client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-        # FIX: Remove curly braces from f-string, keep prompt text unchanged
-        prompt = """Create a study plan for Of course. Based on our detailed discussion, here is a comprehensive and effective prompt tailored to guide your LLM. This prompt synthesizes our objectives, challenges, and specific requirements into a single set of instructions.
+_JSON_RE = re.compile(r'\{.*\}', re.S)
+
+def _extract_json(content):
+    """Parse the outermost JSON object in a completion, ignoring prose or markdown fences around it"""
+    match = _JSON_RE.search(content)
+    return json.loads(match.group(0) if match else content)
+
+# FIX: Remove curly braces from f-string, keep prompt text unchanged
+PLAN_PROMPT = """Create a study plan for Of course. Based on our detailed discussion, here is a comprehensive and effective prompt tailored to guide your LLM. This prompt synthesizes our objectives, challenges, and specific requirements into a single set of instructions.
 
 ## Master Prompt for Your AI Learning Platform
 You are an expert curriculum designer and learning coach. Your primary task is to generate a personalized, adaptive learning plan for a student based on their stated goal. The entire response must be in Markdown format.
@@ -54,86 +65,242 @@ A specific, searchable video title and channel name.
 Practical Challenge: A small, specific coding problem or task to solidify understanding.
 
 Common Pitfalls: A list of 2-3 common mistakes or misunderstandings that beginners often encounter with this topic."""
+
+def _plan_messages():
+    return [{"role": "user", "content": PLAN_PROMPT}]
+
+def _build_plan_data(content, subject, current_level, time_commitment):
+    """Turn a raw plan completion into plan data with remediation resources attached"""
+    try:
+        plan_data = _extract_json(content)
+        # Add resource links if missing
+        remediation = get_remediation_resources(subject)
+        if remediation:
+            plan_data.setdefault('resources', [])
+            plan_data['resources'].extend([
+                {
+                    "type": "video",
+                    "title": f"YouTube Tutorials for {subject}",
+                    "url": remediation['video_url']
+                },
+                {
+                    "type": "article",
+                    "title": f"Comprehensive Guides for {subject}",
+                    "url": remediation['article_url']
+                },
+                {
+                    "type": "practice",
+                    "title": f"Practice Exercises for {subject}",
+                    "url": remediation['practice_url']
+                }
+            ])
+        return True, plan_data
+    except json.JSONDecodeError:
+        remediation = get_remediation_resources(subject)
+        return True, {
+            "title": f"Study Plan: {subject}",
+            "overview": content,
+            "duration": time_commitment,
+            "difficulty": current_level,
+            "modules": [],
+            "milestones": [],
+            "resources": [
+                {
+                    "type": "video",
+                    "title": f"YouTube Tutorials for {subject}",
+                    "url": remediation['video_url'] if remediation else ""
+                },
+                {
+                    "type": "article",
+                    "title": f"Comprehensive Guides for {subject}",
+                    "url": remediation['article_url'] if remediation else ""
+                },
+                {
+                    "type": "practice",
+                    "title": f"Practice Exercises for {subject}",
+                    "url": remediation['practice_url'] if remediation else ""
+                }
+            ],
+            "tips": []
+        }
+
+def generate_plan_with_groq(subject, learning_goal, current_level, time_commitment, additional_context=""):
+    try:
+        client = get_groq()
         response = client.chat.completions.create(
             model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+            messages=_plan_messages(),
             temperature=0.7,
             max_tokens=4000
         )
         
         content = response.choices[0].message.content
-        
-        try:
-            plan_data = json.loads(content)
-            # Add resource links if missing
-            remediation = get_remediation_resources(subject)
-            if remediation:
-                plan_data.setdefault('resources', [])
-                plan_data['resources'].extend([
-                    {
-                        "type": "video",
-                        "title": f"YouTube Tutorials for {subject}",
-                        "url": remediation['video_url']
-                    },
-                    {
-                        "type": "article",
-                        "title": f"Comprehensive Guides for {subject}",
-                        "url": remediation['article_url']
-                    },
-                    {
-                        "type": "practice",
-                        "title": f"Practice Exercises for {subject}",
-                        "url": remediation['practice_url']
-                    }
-                ])
-            return True, plan_data
-        except:
-            remediation = get_remediation_resources(subject)
-            return True, {
-                "title": f"Study Plan: {subject}",
-                "overview": content,
-                "duration": time_commitment,
-                "difficulty": current_level,
-                "modules": [],
-                "milestones": [],
-                "resources": [
-                    {
-                        "type": "video",
-                        "title": f"YouTube Tutorials for {subject}",
-                        "url": remediation['video_url'] if remediation else ""
-                    },
-                    {
-                        "type": "article",
-                        "title": f"Comprehensive Guides for {subject}",
-                        "url": remediation['article_url'] if remediation else ""
-                    },
-                    {
-                        "type": "practice",
-                        "title": f"Practice Exercises for {subject}",
-                        "url": remediation['practice_url'] if remediation else ""
-                    }
-                ],
-                "tips": []
-            }
+        return _build_plan_data(content, subject, current_level, time_commitment)
     except Exception as e:
         return False, str(e)
 
+QUIZ_BATCH_SIZE = 5
+
+QUIZ_CACHE_TTL = 24 * 60 * 60
+QUIZ_CACHE_SIMILARITY = 0.9
+_TOPIC_STOP_WORDS = frozenset({'a', 'an', 'the', 'of', 'to', 'in', 'and', 'for', 'on', 'with', 'about'})
+
+# Most quizzes kept per (difficulty, question count) bucket
+QUIZ_CACHE_MAX_ENTRIES = 200
+
+@st.cache_resource
+def _quiz_cache():
+    """Process-wide store of generated quizzes: (difficulty, n) -> {topic_key: (timestamp, quiz)}, with its lock"""
+    return threading.Lock(), {}
+
+def _topic_key(topic):
+    """Normalize a topic so reorderings like 'Basics of Python' and 'python basics' collide
+    
+    Words are split on whitespace only, so symbols that carry meaning ('C++', 'C#') stay in the key.
+    """
+    words = set(topic.lower().split()) - _TOPIC_STOP_WORDS
+    return " ".join(sorted(words)) or topic.lower().strip()
+
+def _is_valid_quiz(quiz_data):
+    """Whether a parsed quiz has questions the quiz page can render and score"""
+    questions = quiz_data.get('questions') if isinstance(quiz_data, dict) else None
+    if not questions or not isinstance(questions, list):
+        return False
+    for q in questions:
+        if not isinstance(q, dict):
+            return False
+        options = q.get('options')
+        if not q.get('question') or not options or not isinstance(options, list):
+            return False
+        answer = q.get('correct_answer')
+        if not isinstance(answer, int) or isinstance(answer, bool) or not 0 <= answer < len(options):
+            return False
+    return True
+
+def lookup_cached_quiz(subject, difficulty, num_questions):
+    """Return a previously generated quiz for the same or a near-identical topic, or None"""
+    lock, buckets = _quiz_cache()
+    now = time.time()
+    key = _topic_key(subject)
+    
+    with lock:
+        bucket = buckets.get((difficulty, num_questions), {})
+        entry = bucket.get(key)
+        if entry and now - entry[0] < QUIZ_CACHE_TTL:
+            return copy.deepcopy(entry[1])
+        
+        # Near-duplicate topic: reuse it with the question order reshuffled
+        fresh_keys = [k for k, (ts, _) in bucket.items() if now - ts < QUIZ_CACHE_TTL]
+        matches = difflib.get_close_matches(key, fresh_keys, n=1, cutoff=QUIZ_CACHE_SIMILARITY)
+        quiz_data = copy.deepcopy(bucket[matches[0]][1]) if matches else None
+    
+    if quiz_data is not None:
+        random.shuffle(quiz_data.get('questions', []))
+    return quiz_data
+
+def store_cached_quiz(subject, difficulty, num_questions, quiz_data):
+    """Remember a generated quiz for later lookups; quizzes without usable questions are not kept"""
+    if not _is_valid_quiz(quiz_data):
+        return
+    lock, buckets = _quiz_cache()
+    now = time.time()
+    entry = (now, copy.deepcopy(quiz_data))
+    
+    with lock:
+        bucket = buckets.setdefault((difficulty, num_questions), {})
+        bucket[_topic_key(subject)] = entry
+        if len(bucket) > QUIZ_CACHE_MAX_ENTRIES:
+            # Drop expired quizzes first, then the oldest until the bucket fits
+            for k in [k for k, (ts, _) in bucket.items() if now - ts >= QUIZ_CACHE_TTL]:
+                del bucket[k]
+            for k in sorted(bucket, key=lambda k: bucket[k][0])[:len(bucket) - QUIZ_CACHE_MAX_ENTRIES]:
+                del bucket[k]
+
+def _quiz_prompt(subject, difficulty, num_questions):
+    return f"""Create a {difficulty} quiz about {subject} with {num_questions} questions. Return JSON format."""
+
+def _quiz_messages(subject, difficulty, num_questions):
+    return [{"role": "user", "content": _quiz_prompt(subject, difficulty, num_questions)}]
+
+def parse_quiz_content(content):
+    """Parse a raw quiz completion into quiz data"""
+    try:
+        return True, _extract_json(content)
+    except json.JSONDecodeError as e:
+        return False, str(e)
+
 def generate_quiz_with_groq(subject, difficulty, num_questions=5):
     try:
-        client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-        
-        prompt = f"""Create a {difficulty} quiz about {subject} with {num_questions} questions. Return JSON format."""
+        client = get_groq()
         
         response = client.chat.completions.create(
             model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+            messages=_quiz_messages(subject, difficulty, num_questions),
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=2000,
+            response_format={"type": "json_object"}
         )
         
         content = response.choices[0].message.content
-        quiz_data = json.loads(content)
+        quiz_data = _extract_json(content)
+        return True, quiz_data
+        
+    except Exception as e:
+        return False, str(e)
+
+async def _astream_quiz(subject, difficulty, num_questions):
+    # The client is closed with the generator; its connections belong to this event loop
+    async with AsyncGroq(api_key=st.secrets["GROQ_API_KEY"]) as client:
+        stream = await client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=_quiz_messages(subject, difficulty, num_questions),
+            temperature=0.7,
+            max_tokens=2000,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+def stream_quiz_with_groq(subject, difficulty, num_questions=5):
+    """Yield quiz completion tokens as they arrive (usable with st.write_stream)"""
+    agen = _astream_quiz(subject, difficulty, num_questions)
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.close()
+
+async def agenerate_quiz_with_groq(subject, difficulty, num_questions=5):
+    """Generate a quiz with AsyncGroq, splitting large quizzes into concurrent batches"""
+    try:
+        batch_sizes = [
+            min(QUIZ_BATCH_SIZE, num_questions - start)
+            for start in range(0, num_questions, QUIZ_BATCH_SIZE)
+        ]
+        async with AsyncGroq(api_key=st.secrets["GROQ_API_KEY"]) as client:
+            responses = await asyncio.gather(*(
+                client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=_quiz_messages(subject, difficulty, size),
+                    temperature=0.7,
+                    max_tokens=2000,
+                    response_format={"type": "json_object"}
+                )
+                for size in batch_sizes
+            ))
+        
+        quiz_data = _extract_json(responses[0].choices[0].message.content)
+        for response in responses[1:]:
+            batch = _extract_json(response.choices[0].message.content)
+            quiz_data.setdefault('questions', []).extend(batch.get('questions', []))
         return True, quiz_data
         
     except Exception as e:
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
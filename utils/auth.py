@@ -1,9 +1,21 @@
 import streamlit as st
 import firebase_admin
-from firebase_admin import auth, firestore
+from firebase_admin import auth, credentials, firestore
+import functools
+import threading
 import time
 import hashlib
-import base64
+from utils.clients import get_db
+
+@functools.lru_cache(maxsize=1)
+def init_firebase():
+    """Initialize Firebase once per process; Streamlit reruns hit the lru_cache"""
+    if not firebase_admin._apps:
+        creds = credentials.Certificate(dict(st.secrets["firebase_credentials"]))
+        firebase_admin.initialize_app(creds)
+        # Open the Firestore channel in the background while the login UI renders
+        from utils.db import warm_firestore
+        threading.Thread(target=warm_firestore, daemon=True).start()
 
 def get_session_key():
     """Generate a simple session key based on browser session"""
@@ -14,6 +26,14 @@ def get_session_key():
         st.session_state.session_key = str(uuid.uuid4())
     return st.session_state.session_key
 
+def get_display_name(email):
+    """Derive a friendly display name from an email address"""
+    return email.split('@')[0].title() if email else 'User'
+
+def _email_id(email):
+    """Document id for an email in the email_index collection (bucketing only, not security-sensitive)"""
+    return hashlib.blake2b(email.encode(), digest_size=16).hexdigest()
+
 def save_user_session(user_id, email):
     """Save user session in a more persistent way"""
     session_key = get_session_key()
@@ -22,6 +42,7 @@ def save_user_session(user_id, email):
     st.session_state['logged_in'] = True
     st.session_state['user_id'] = user_id
     st.session_state['user_email'] = email
+    st.session_state['display_name'] = get_display_name(email)
     st.session_state['auth_timestamp'] = time.time()
     
     # Also save to browser localStorage equivalent using secrets
@@ -31,10 +52,7 @@ def save_user_session(user_id, email):
         'timestamp': time.time()
     }
     
-    # Encode session data
-    import json
-    session_str = base64.b64encode(json.dumps(session_data).encode()).decode()
-    st.session_state['persistent_session'] = session_str
+    st.session_state['persistent_session'] = session_data
     
     return True
 
@@ -42,14 +60,10 @@ def restore_user_session():
     """Restore user session if it exists"""
     try:
         # Check if we have a persistent session
-        session_data_str = st.session_state.get('persistent_session')
-        if not session_data_str:
+        session_data = st.session_state.get('persistent_session')
+        if not session_data:
             return False
         
-        # Decode session data
-        import json
-        session_data = json.loads(base64.b64decode(session_data_str.encode()).decode())
-        
         # Check if session is still valid (within 24 hours)
         current_time = time.time()
         session_time = session_data.get('timestamp', 0)
@@ -59,7 +73,7 @@ def restore_user_session():
             return False
         
         # Verify user still exists in database
-        db = firestore.client()
+        db = get_db()
         user_doc = db.collection('users').document(session_data['user_id']).get()
         
         if user_doc.exists:
@@ -67,6 +81,7 @@ def restore_user_session():
             st.session_state['logged_in'] = True
             st.session_state['user_id'] = session_data['user_id']
             st.session_state['user_email'] = session_data['email']
+            st.session_state['display_name'] = get_display_name(session_data['email'])
             st.session_state['auth_timestamp'] = current_time
             return True
         
@@ -81,17 +96,23 @@ def login_user(email, password):
     try:
         # Note: Firebase Admin SDK doesn't directly authenticate users with password
         # For demo purposes, we'll check if user exists in Firestore
-        db = firestore.client()
+        db = get_db()
         
-        # Check if user exists in Firestore
-        users_ref = db.collection('users')
-        query = users_ref.where('email', '==', email).limit(1)
-        docs = list(query.stream())
+        # Look the user up by email with a single document get
+        index_ref = db.collection('email_index').document(_email_id(email))
+        index_doc = index_ref.get()
+        user_id = index_doc.to_dict()['uid'] if index_doc.exists else None
         
-        if docs:
-            user_doc = docs[0]
-            user_id = user_doc.id
-            
+        if user_id is None:
+            # Accounts created before the index existed: query users, then backfill the index
+            users_ref = db.collection('users')
+            query = users_ref.where('email', '==', email).limit(1)
+            docs = list(query.stream())
+            if docs:
+                user_id = docs[0].id
+                index_ref.set({'uid': user_id})
+        
+        if user_id:
             # Save session
             if save_user_session(user_id, email):
                 st.success("Login successful!")
@@ -119,13 +140,14 @@ def signup_user(email, password):
         )
         
         # Store user data in Firestore
-        db = firestore.client()
+        db = get_db()
         db.collection('users').document(user.uid).set({
             'email': email,
             'created_at': firestore.SERVER_TIMESTAMP,
             'plans': [],
             'quiz_scores': []
         })
+        db.collection('email_index').document(_email_id(email)).set({'uid': user.uid})
         
         st.success("Account created successfully! Please login with your credentials.")
         
@@ -141,6 +163,7 @@ def logout_user():
         st.session_state['logged_in'] = False
         st.session_state['user_id'] = None
         st.session_state['user_email'] = None
+        st.session_state['display_name'] = None
         st.session_state['persistent_session'] = None
         st.session_state['auth_timestamp'] = None
         st.session_state['page'] = 'dashboard'
@@ -0,0 +1,16 @@
+# utils/clients.py
+
+import functools
+import streamlit as st
+
+@functools.lru_cache(maxsize=1)
+def get_db():
+    """Return the process-wide Firestore client so every call reuses one gRPC channel"""
+    from firebase_admin import firestore
+    return firestore.client()
+
+@st.cache_resource
+def get_groq():
+    """Return the process-wide Groq client so reruns reuse its connection pool"""
+    from groq import Groq
+    return Groq(api_key=st.secrets["GROQ_API_KEY"])
@@ -2,56 +2,100 @@
 
 import streamlit as st
 from firebase_admin import firestore
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import io
 import base64
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import functools
+import json
+from urllib.parse import quote_plus
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.clients import get_db
+
+def warm_firestore():
+    """Issue one trivial read so the first real query skips the TLS/auth handshake"""
+    try:
+        list(get_db().collection('_warm').limit(1).stream())
+    except Exception as e:
+        print(f"Error warming Firestore connection: {e}")
+
+def _run_parallel(*calls):
+    """Run independent (func, *args) calls concurrently and return their results in order"""
+    ctx = get_script_run_ctx()
+
+    def _with_ctx(func, *args):
+        # Attach the script context so st.error() in the worker still reaches the page
+        add_script_run_ctx(ctx=ctx)
+        return func(*args)
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(_with_ctx, *call) for call in calls]
+        return [future.result() for future in futures]
+
+def _parse_plan_content(plan_content):
+    """Return a JSON-object plan string as a dict; other content is returned unchanged"""
+    if isinstance(plan_content, str):
+        try:
+            parsed = json.loads(plan_content)
+        except ValueError:
+            return plan_content
+        if isinstance(parsed, dict):
+            return parsed
+    return plan_content
+
+def _invalidate_quiz_reads():
+    """Drop cached quiz-score reads after a new score is written"""
+    _load_all_quiz_scores.clear()
+    get_quiz_stats.clear()
+    _load_dashboard_summary.clear()
+    _load_score_summary.clear()
 
 def save_plan_to_firestore(user_id, goal, plan_content):
-    """Save study plan to Firestore"""
+    """Save study plan to Firestore (structured plans are stored as native maps)"""
     try:
-        db = firestore.client()
+        db = get_db()
         plan_data = {
             'goal': goal,
-            'content': plan_content,
+            'content': _parse_plan_content(plan_content),
             'created_at': firestore.SERVER_TIMESTAMP,
             'completed': False
         }
         
         db.collection('users').document(user_id).collection('plans').add(plan_data)
+        _load_user_plans.clear()
         return True
     except Exception as e:
         st.error(f"Error saving plan: {e}")
         return False
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_user_plans(user_id):
+    """A user's study plans, newest first; errors raise so they are not cached"""
+    db = get_db()
+    plans_ref = db.collection('users').document(user_id).collection('plans')
+    plans = plans_ref.order_by('created_at', direction=firestore.Query.DESCENDING).stream()
+    
+    plan_list = []
+    for plan in plans:
+        plan_data = plan.to_dict()
+        plan_data['id'] = plan.id
+        plan_list.append(plan_data)
+    
+    return plan_list
+
 def get_user_plans(user_id):
     """Get all user's study plans"""
     try:
-        db = firestore.client()
-        plans_ref = db.collection('users').document(user_id).collection('plans')
-        plans = plans_ref.order_by('created_at', direction=firestore.Query.DESCENDING).stream()
-        
-        plan_list = []
-        for plan in plans:
-            plan_data = plan.to_dict()
-            plan_data['id'] = plan.id
-            plan_list.append(plan_data)
-        
-        return plan_list
+        return _load_user_plans(user_id)
     except Exception as e:
         st.error(f"Error fetching plans: {e}")
         return []
 
-def save_quiz_score(user_id, topic, score, total_questions):
-    """Save quiz score to Firestore"""
+def save_quiz_score(user_id, topic, score, total_questions, results=None):
+    """Save quiz score (and optional per-question results) to Firestore in one transaction"""
     try:
-        db = firestore.client()
+        db = get_db()
         score_data = {
             'topic': topic,
             'score': score,
@@ -60,102 +104,259 @@ def save_quiz_score(user_id, topic, score, total_questions):
             'completed_at': firestore.SERVER_TIMESTAMP
         }
         
-        db.collection('users').document(user_id).collection('quiz_scores').add(score_data)
+        user_ref = db.collection('users').document(user_id)
+        scores_ref = user_ref.collection('quiz_scores')
+        stats_ref = user_ref.collection('stats').document('summary')
+        score_ref = scores_ref.document()
+        
+        @firestore.transactional
+        def write_score(transaction):
+            # Keep the rolled-up stats summary in step with the score in the same commit
+            if stats_ref.get(transaction=transaction).exists:
+                transaction.set(stats_ref, {
+                    'total_quizzes': firestore.Increment(1),
+                    'total_percentage': firestore.Increment(score_data['percentage']),
+                    'per_topic': {topic: {
+                        'sum': firestore.Increment(score_data['percentage']),
+                        'cnt': firestore.Increment(1)
+                    }}
+                }, merge=True)
+            else:
+                # First save since the summary existed: seed it from the scores already stored
+                existing = [score.to_dict() for score in scores_ref.select(_ANALYTICS_FIELDS).get(transaction=transaction)]
+                transaction.set(stats_ref, _stats_totals(existing + [score_data]))
+            transaction.set(score_ref, score_data)
+            for i, result in enumerate(results or []):
+                transaction.set(score_ref.collection('results').document(str(i)), {
+                    'question': result['question'],
+                    'user_answer': result['user_answer'],
+                    'correct_answer': result['correct_answer'],
+                    'is_correct': result['is_correct']
+                })
+        
+        write_score(db.transaction())
+        _invalidate_quiz_reads()
         return True
     except Exception as e:
         st.error(f"Error saving quiz score: {e}")
         return False
 
+def migrate_legacy_plans(user_id, plans):
+    """Rewrite plans whose content is stringified JSON as native Firestore maps.
+
+    Updates the given plan dicts in place and returns the number migrated.
+    """
+    migrated = 0
+    try:
+        db = get_db()
+        plans_ref = db.collection('users').document(user_id).collection('plans')
+        for plan in plans:
+            content = plan.get('content')
+            parsed = _parse_plan_content(content)
+            if parsed is not content:
+                plans_ref.document(plan['id']).update({'content': parsed})
+                plan['content'] = parsed
+                migrated += 1
+    except Exception as e:
+        st.error(f"Error migrating plans: {e}")
+    if migrated:
+        _load_user_plans.clear()
+    return migrated
+
 def delete_plan_from_firestore(user_id, plan_id):
     """Delete a study plan from Firestore"""
     try:
-        db = firestore.client()
+        db = get_db()
         db.collection('users').document(user_id).collection('plans').document(plan_id).delete()
+        _load_user_plans.clear()
         return True
     except Exception as e:
         st.error(f"Error deleting plan: {e}")
         return False
 
-def get_user_analytics(user_id):
+# Firestore rejects write batches with more than 500 operations
+MAX_BATCH_WRITES = 500
+
+def _batch_delete(refs):
+    """Delete document references with as few batched commits as possible"""
+    refs = list(refs)
+    db = get_db()
+    for start in range(0, len(refs), MAX_BATCH_WRITES):
+        batch = db.batch()
+        for ref in refs[start:start + MAX_BATCH_WRITES]:
+            batch.delete(ref)
+        batch.commit()
+
+def delete_plans_from_firestore(user_id, plan_ids):
+    """Delete several study plans from Firestore in batched commits"""
+    try:
+        plans_ref = get_db().collection('users').document(user_id).collection('plans')
+        _batch_delete(plans_ref.document(plan_id) for plan_id in plan_ids)
+        _load_user_plans.clear()
+        return True
+    except Exception as e:
+        st.error(f"Error deleting plans: {e}")
+        return False
+
+STREAK_WINDOW_DAYS = 30
+
+# The only quiz_scores fields the analytics readers consult
+_ANALYTICS_FIELDS = ['topic', 'percentage', 'completed_at']
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_all_quiz_scores(user_id):
+    """Stream a user's quiz scores once, newest first; the analytics helpers derive from this list"""
+    db = get_db()
+    scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
+    # Every document is downloaded anyway, so sort locally instead of asking the server to order them;
+    # like order_by, skip documents without a completion time
+    scores = [score.to_dict() for score in scores_ref.select(_ANALYTICS_FIELDS).stream()]
+    scores = [score_data for score_data in scores if score_data.get('completed_at')]
+    scores.sort(key=lambda score_data: score_data['completed_at'], reverse=True)
+    return scores
+
+def _quick_stats(scores):
+    """Overall average plus per-topic averages and best/worst topics, in one pass over the scores"""
+    topic_sum = defaultdict(float)
+    topic_cnt = defaultdict(int)
+    global_sum = 0
+    for score_data in scores:
+        topic = score_data.get('topic', 'Unknown')
+        percentage = score_data.get('percentage', 0)
+        topic_sum[topic] += percentage
+        topic_cnt[topic] += 1
+        global_sum += percentage
+    
+    topic_averages = {topic: topic_sum[topic] / topic_cnt[topic] for topic in topic_sum}
+    return _stats_from_averages(global_sum / len(scores) if scores else 0, topic_averages)
+
+def _stats_from_averages(average_score, topic_averages):
+    """Quick-stats dict with best/worst topics picked from per-topic averages"""
+    return {
+        'average_score': average_score,
+        'topic_averages': topic_averages,
+        'best_topic': max(topic_averages, key=topic_averages.get) if topic_averages else None,
+        'worst_topic': min(topic_averages, key=topic_averages.get) if topic_averages else None
+    }
+
+def _stats_totals(scores):
+    """Roll quiz scores up into the totals kept on the users/{uid}/stats/summary document"""
+    per_topic = {}
+    for score_data in scores:
+        totals = per_topic.setdefault(score_data.get('topic', 'Unknown'), {'sum': 0, 'cnt': 0})
+        totals['sum'] += score_data.get('percentage', 0)
+        totals['cnt'] += 1
+    return {
+        'total_quizzes': len(scores),
+        'total_percentage': sum(totals['sum'] for totals in per_topic.values()),
+        'per_topic': per_topic
+    }
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_quiz_stats(user_id):
+    """Quick stats from the single stats summary document; users without one fall back to scanning their scores"""
+    summary = get_db().collection('users').document(user_id).collection('stats').document('summary').get()
+    if not summary.exists:
+        return _quick_stats(_load_all_quiz_scores(user_id))
+    
+    totals = summary.to_dict()
+    total_quizzes = totals.get('total_quizzes', 0)
+    topic_averages = {
+        topic: topic_totals['sum'] / topic_totals['cnt']
+        for topic, topic_totals in totals.get('per_topic', {}).items()
+        if topic_totals.get('cnt')
+    }
+    return _stats_from_averages(totals.get('total_percentage', 0) / total_quizzes if total_quizzes else 0, topic_averages)
+
+def get_user_analytics(user_id, scores=None):
     """Get comprehensive user analytics data"""
     try:
-        db = firestore.client()
-        
-        # Get quiz scores
-        scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
-        scores = scores_ref.order_by('completed_at', direction=firestore.Query.DESCENDING).stream()
+        if scores is None:
+            scores = _load_all_quiz_scores(user_id)
         
         analytics_data = {
             'total_quizzes': 0,
             'average_score': 0,
-            'topics_studied': set(),
+            'topics_studied': [],
             'quiz_history': [],
             'best_topic': None,
             'worst_topic': None,
             'current_streak': 0
         }
         
-        quiz_list = []
-        for score in scores:
-            score_data = score.to_dict()
-            quiz_list.append(score_data)
-            analytics_data['topics_studied'].add(score_data.get('topic', 'Unknown'))
+        stats = _quick_stats(scores)
+        analytics_data['topics_studied'] = list(stats['topic_averages'])
         
-        if quiz_list:
-            analytics_data['total_quizzes'] = len(quiz_list)
-            analytics_data['average_score'] = sum(q.get('percentage', 0) for q in quiz_list) / len(quiz_list)
-            analytics_data['quiz_history'] = quiz_list
+        if scores:
+            analytics_data['total_quizzes'] = len(scores)
+            analytics_data['average_score'] = stats['average_score']
+            analytics_data['quiz_history'] = scores
             
             # Calculate best and worst topics
-            topic_scores = defaultdict(list)
-            for quiz in quiz_list:
-                topic_scores[quiz.get('topic', 'Unknown')].append(quiz.get('percentage', 0))
-            
-            topic_averages = {topic: sum(scores)/len(scores) for topic, scores in topic_scores.items()}
-            analytics_data['best_topic'] = max(topic_averages, key=topic_averages.get) if topic_averages else None
-            analytics_data['worst_topic'] = min(topic_averages, key=topic_averages.get) if topic_averages else None
+            analytics_data['best_topic'] = stats['best_topic']
+            analytics_data['worst_topic'] = stats['worst_topic']
         
-        analytics_data['topics_studied'] = list(analytics_data['topics_studied'])
         return analytics_data
         
     except Exception as e:
         st.error(f"Error fetching analytics: {e}")
         return None
 
-def get_user_quiz_history(user_id, limit=50):
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_score_summary(user_id):
+    """Quiz count, average score and pass count from aggregation queries; errors raise so they are not cached"""
+    db = get_db()
+    scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
+    
+    # Only the aggregate values cross the wire, not the quiz documents
+    overall, passed = _run_parallel(
+        (scores_ref.count(alias='total').avg('percentage', alias='average').get,),
+        (scores_ref.where('percentage', '>=', 60).count(alias='passed').get,)
+    )
+    values = {result.alias: result.value for results in (overall, passed) for result in results[0]}
+    
+    return {
+        'total_quizzes': int(values.get('total') or 0),
+        'average_score': values.get('average') or 0,
+        'passed_quizzes': int(values.get('passed') or 0)
+    }
+
+def get_user_score_summary(user_id):
+    """Get quiz count, average score and pass count from Firestore aggregation queries"""
+    try:
+        return _load_score_summary(user_id)
+    except Exception as e:
+        st.error(f"Error fetching score summary: {e}")
+        return None
+
+def get_user_quiz_history(user_id, limit=50, scores=None):
     """Get detailed quiz history for analytics"""
     try:
-        db = firestore.client()
-        scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
-        scores = scores_ref.order_by('completed_at', direction=firestore.Query.DESCENDING).limit(limit).stream()
-        
-        history = []
-        for score in scores:
-            score_data = score.to_dict()
-            # Convert Firestore timestamp to datetime if needed
-            if 'completed_at' in score_data and score_data['completed_at']:
-                score_data['completed_at'] = score_data['completed_at']
-            history.append(score_data)
-        
-        return history
+        if scores is None:
+            scores = _load_all_quiz_scores(user_id)
+        return scores[:limit]
     except Exception as e:
         st.error(f"Error fetching quiz history: {e}")
         return []
 
-def get_learning_streak(user_id):
+def get_learning_streak(user_id, scores=None):
     """Calculate user's current learning streak"""
     try:
-        db = firestore.client()
-        scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
-        
-        # Get recent quiz dates
-        recent_scores = scores_ref.order_by('completed_at', direction=firestore.Query.DESCENDING).limit(30).stream()
-        
+        # Only the last STREAK_WINDOW_DAYS can contribute to a streak
+        window_start = datetime.now(timezone.utc) - timedelta(days=STREAK_WINDOW_DAYS)
+        if scores is None:
+            db = get_db()
+            scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
+            recent = scores_ref.where('completed_at', '>=', window_start).select(['completed_at']).stream()
+            completed = [score.to_dict().get('completed_at') for score in recent]
+        else:
+            completed = [score_data.get('completed_at') for score_data in scores]
+        
+        # Recent quiz dates
         quiz_dates = []
-        for score in recent_scores:
-            score_data = score.to_dict()
-            if 'completed_at' in score_data and score_data['completed_at']:
-                quiz_date = score_data['completed_at'].date()
+        for completed_at in completed:
+            if completed_at and completed_at >= window_start:
+                quiz_date = completed_at.date()
                 if quiz_date not in quiz_dates:
                     quiz_dates.append(quiz_date)
         
@@ -180,16 +381,14 @@ def get_learning_streak(user_id):
         st.error(f"Error calculating streak: {e}")
         return 0
 
-def get_topic_performance(user_id):
+def get_topic_performance(user_id, scores=None):
     """Get performance breakdown by topic"""
     try:
-        db = firestore.client()
-        scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
-        scores = scores_ref.stream()
+        if scores is None:
+            scores = _load_all_quiz_scores(user_id)
         
         topic_data = {}
-        for score in scores:
-            score_data = score.to_dict()
+        for score_data in scores:
             topic = score_data.get('topic', 'Unknown')
             percentage = score_data.get('percentage', 0)
             
@@ -212,12 +411,13 @@ def get_topic_performance(user_id):
         st.error(f"Error fetching topic performance: {e}")
         return {}
 
+@functools.lru_cache(maxsize=256)
 def get_remediation_resources(topic):
     """Get remediation resources for a specific topic"""
     try:
         # For now, return generic resources based on topic
         # You can expand this to store and retrieve specific resources from Firestore
-        topic_clean = topic.replace(' ', '+')
+        topic_clean = quote_plus(topic)
         
         return {
             'video_url': f"https://www.youtube.com/results?search_query={topic_clean}+tutorial",
@@ -232,9 +432,8 @@ def get_remediation_resources(topic):
 def get_study_recommendations(user_id):
     """Get personalized study recommendations based on performance"""
     try:
-        analytics = get_user_analytics(user_id)
-        if not analytics:
-            return []
+        # Only the average and weakest topic are needed, so read the stats summary instead of every quiz
+        analytics = get_quiz_stats(user_id)
         
         recommendations = []
         
@@ -274,65 +473,92 @@ def get_study_recommendations(user_id):
 def update_plan_progress(user_id, plan_id, progress_data):
     """Update progress on a specific study plan"""
     try:
-        db = firestore.client()
+        db = get_db()
         plan_ref = db.collection('users').document(user_id).collection('plans').document(plan_id)
         
         plan_ref.update({
             'progress': progress_data,
             'last_updated': firestore.SERVER_TIMESTAMP
         })
+        _load_user_plans.clear()
         
         return True
     except Exception as e:
         st.error(f"Error updating plan progress: {e}")
         return False
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_dashboard_summary(user_id):
+    """Dashboard summary read; errors raise so they are not cached"""
+    db = get_db()
+    
+    scores_ref = db.collection('users').document(user_id).collection('quiz_scores')
+    
+    # Recent quizzes plus server-side totals; only 5 documents and the aggregates are downloaded
+    recent_scores, totals, learning_streak = _run_parallel(
+        (lambda: list(scores_ref.select(_ANALYTICS_FIELDS).order_by('completed_at', direction=firestore.Query.DESCENDING).limit(5).stream()),),
+        (scores_ref.count(alias='total').avg('percentage', alias='average').get,),
+        (get_learning_streak, user_id)
+    )
+    
+    recent_performance = []
+    for score in recent_scores:
+        score_data = score.to_dict()
+        recent_performance.append({
+            'topic': score_data.get('topic', 'Unknown'),
+            'percentage': score_data.get('percentage', 0),
+            'date': score_data.get('completed_at')
+        })
+    
+    values = {result.alias: result.value for result in totals[0]}
+    total_quizzes = int(values.get('total') or 0)
+    average_performance = values.get('average') or 0
+    
+    return {
+        'total_quizzes': total_quizzes,
+        'average_performance': average_performance,
+        'recent_performance': recent_performance,
+        'learning_streak': learning_streak
+    }
+
 def get_dashboard_summary(user_id):
     """Get summary data for dashboard display"""
     try:
-        db = firestore.client()
-        
-        # Get recent quiz performance
-        recent_scores = db.collection('users').document(user_id).collection('quiz_scores')\
-                         .order_by('completed_at', direction=firestore.Query.DESCENDING)\
-                         .limit(5).stream()
-        
-        recent_performance = []
-        for score in recent_scores:
-            score_data = score.to_dict()
-            recent_performance.append({
-                'topic': score_data.get('topic', 'Unknown'),
-                'percentage': score_data.get('percentage', 0),
-                'date': score_data.get('completed_at')
-            })
-        
-        # Get total stats
-        all_scores = db.collection('users').document(user_id).collection('quiz_scores').stream()
-        total_quizzes = 0
-        total_percentage = 0
-        
-        for score in all_scores:
-            score_data = score.to_dict()
-            total_quizzes += 1
-            total_percentage += score_data.get('percentage', 0)
-        
-        average_performance = total_percentage / total_quizzes if total_quizzes > 0 else 0
-        
-        return {
-            'total_quizzes': total_quizzes,
-            'average_performance': average_performance,
-            'recent_performance': recent_performance,
-            'learning_streak': get_learning_streak(user_id)
-        }
-        
+        return _load_dashboard_summary(user_id)
     except Exception as e:
         st.error(f"Error fetching dashboard summary: {e}")
         return None
 
+def get_dashboard_bundle(user_id):
+    """Fetch dashboard summary and study plans concurrently in one call"""
+    summary, plans = _run_parallel(
+        (get_dashboard_summary, user_id),
+        (get_user_plans, user_id)
+    )
+    return summary, plans
+
+# Platforms whose integration documents are read (and cached) together
+INTEGRATION_PLATFORMS = ('github', 'google_calendar', 'udemy')
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_integration_docs(user_id):
+    """All of a user's integration documents in one batched read; errors raise so they are not cached"""
+    db = get_db()
+    refs = [db.collection('integrations').document(f"{user_id}_{platform}") for platform in INTEGRATION_PLATFORMS]
+    docs = {doc.id: doc for doc in db.get_all(refs)}
+    return {
+        platform: docs[ref.id].to_dict() if ref.id in docs and docs[ref.id].exists else None
+        for platform, ref in zip(INTEGRATION_PLATFORMS, refs)
+    }
+
+def _invalidate_integration_reads():
+    """Drop cached integration reads after a document is written or deleted"""
+    _load_integration_docs.clear()
+
 def save_integration_data(user_id, platform, data):
     """Save integration data for a user"""
     try:
-        db = firestore.client()
+        db = get_db()
         integration_ref = db.collection('integrations').document(f"{user_id}_{platform}")
         data['updated_at'] = datetime.now()
         integration_ref.set(data)
@@ -340,65 +566,164 @@ def save_integration_data(user_id, platform, data):
     except Exception as e:
         print(f"Error saving integration data: {e}")
         return False
+    finally:
+        _invalidate_integration_reads()
 
-def get_integration_data(user_id, platform):
-    """Get integration data for a user and platform"""
+def patch_integration_data(user_id, platform, patch):
+    """Update fields of an existing integration document without reading it first; False if it doesn't exist"""
     try:
-        db = firestore.client()
+        db = get_db()
         integration_ref = db.collection('integrations').document(f"{user_id}_{platform}")
-        doc = integration_ref.get()
-        if doc.exists:
-            return doc.to_dict()
-        return None
+        integration_ref.update({**patch, 'updated_at': datetime.now()})
+        return True
+    except Exception as e:
+        print(f"Error patching integration data: {e}")
+        return False
+    finally:
+        _invalidate_integration_reads()
+
+def get_integration_data(user_id, platform):
+    """Get integration data for a user and platform (served from the shared per-user read)"""
+    return get_all_integration_data(user_id, (platform,))[platform]
+
+def get_all_integration_data(user_id, platforms=INTEGRATION_PLATFORMS):
+    """Get integration data for several platforms in one batched read, cached briefly per user"""
+    try:
+        docs = _load_integration_docs(user_id)
+        return {platform: docs.get(platform) for platform in platforms}
     except Exception as e:
         print(f"Error getting integration data: {e}")
-        return None
+        return {platform: None for platform in platforms}
 
 def delete_integration_data(user_id, platform):
     """Delete integration data for a user and platform"""
     try:
-        db = firestore.client()
+        db = get_db()
         integration_ref = db.collection('integrations').document(f"{user_id}_{platform}")
         integration_ref.delete()
         return True
     except Exception as e:
         print(f"Error deleting integration data: {e}")
         return False
+    finally:
+        _invalidate_integration_reads()
+
+def delete_integrations_data(user_id, platforms):
+    """Delete integration data for several platforms in batched commits"""
+    try:
+        integrations_ref = get_db().collection('integrations')
+        _batch_delete(integrations_ref.document(f"{user_id}_{platform}") for platform in platforms)
+        return True
+    except Exception as e:
+        print(f"Error deleting integration data: {e}")
+        return False
+    finally:
+        _invalidate_integration_reads()
+
+@functools.lru_cache(maxsize=1)
+def _pdf_styles():
+    """Build the report's paragraph and table styles once per process; ReportLab reuses them across documents"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.enums import TA_CENTER
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=colors.darkblue
+    )
+    
+    # Spacing between list items is carried by the style rather than a Spacer per item
+    list_item_style = ParagraphStyle(
+        'ListItem',
+        parent=styles['Normal'],
+        spaceAfter=8
+    )
+    
+    header_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    summary_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+    ])
+    
+    topic_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+    ])
+    
+    return styles, title_style, heading_style, list_item_style, header_table_style, summary_table_style, topic_table_style
+
+def _make_doc(buffer):
+    """Letter-size report template with explicit one-inch margins (ReportLab's defaults)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+    from reportlab.lib.units import inch
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=inch,
+        rightMargin=inch,
+        topMargin=inch,
+        bottomMargin=inch
+    )
 
 def generate_analytics_pdf(user_id, user_name, user_email=None):
-    """Generate a PDF report of user's learning analytics"""
+    """Generate a PDF report of user's learning analytics as a rewound BytesIO"""
+    # ReportLab is only needed when a report is actually exported
+    from reportlab.platypus import Paragraph, Spacer, Table, ListFlowable
+    from reportlab.lib.units import inch
     try:
-        # Get user data
-        analytics = get_user_analytics(user_id)
-        quiz_history = get_user_quiz_history(user_id, limit=50)
-        user_plans = get_user_plans(user_id)
+        # Get user data; the quiz_scores and plans reads are independent, so run them together
+        scores, user_plans = _run_parallel(
+            (_load_all_quiz_scores, user_id),
+            (get_user_plans, user_id)
+        )
+        analytics = get_user_analytics(user_id, scores=scores)
+        quiz_history = get_user_quiz_history(user_id, limit=50, scores=scores)
         
         if not analytics or not quiz_history:
             return None, "No data available for PDF generation"
         
         # Create PDF buffer
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        doc = _make_doc(buffer)
         story = []
         
         # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.darkblue
-        )
+        styles, title_style, heading_style, list_item_style, header_table_style, summary_table_style, topic_table_style = _pdf_styles()
         
         # Title
         story.append(Paragraph("🎓 AI Learning Coach - Progress Report", title_style))
@@ -414,14 +739,7 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
         ]
         
         header_table = Table(header_data, colWidths=[2*inch, 3*inch])
-        header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        header_table.setStyle(header_table_style)
         
         story.append(header_table)
         story.append(Spacer(1, 20))
@@ -429,13 +747,23 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
         # Learning Summary
         story.append(Paragraph("📈 Learning Summary", heading_style))
         
-        # Calculate additional metrics
-        import pandas as pd
-        df_quizzes = pd.DataFrame(quiz_history)
-        if not df_quizzes.empty:
-            passed_quizzes = len(df_quizzes[df_quizzes['percentage'] >= 60])
+        # Calculate additional metrics in one pass: topic -> [count, sum, max, min]
+        topic_stats = defaultdict(lambda: [0, 0.0, float('-inf'), float('inf')])
+        total_percentage = 0.0
+        passed_quizzes = 0
+        for quiz in quiz_history:
+            percentage = quiz.get('percentage', 0)
+            stats = topic_stats[quiz.get('topic', 'Unknown')]
+            stats[0] += 1
+            stats[1] += percentage
+            stats[2] = max(stats[2], percentage)
+            stats[3] = min(stats[3], percentage)
+            total_percentage += percentage
+            passed_quizzes += percentage >= 60
+        
+        if quiz_history:
             pass_rate = (passed_quizzes / len(quiz_history) * 100)
-            unique_topics = df_quizzes['topic'].nunique()
+            unique_topics = len(topic_stats)
             
             summary_data = [
                 ['Metric', 'Value'],
@@ -448,16 +776,7 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
             ]
             
             summary_table = Table(summary_data, colWidths=[2.5*inch, 2.5*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
+            summary_table.setStyle(summary_table_style)
             
             story.append(summary_table)
             story.append(Spacer(1, 20))
@@ -465,18 +784,12 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
         # Topic Performance
         story.append(Paragraph("📚 Performance by Topic", heading_style))
         
-        if not df_quizzes.empty:
-            topic_performance = df_quizzes.groupby('topic').agg({
-                'percentage': ['mean', 'count', 'max', 'min']
-            }).round(1)
-            
+        if quiz_history:
             topic_data = [['Topic', 'Avg Score', 'Quizzes', 'Best', 'Worst']]
             
-            for topic in topic_performance.index:
-                avg_score = topic_performance.loc[topic, ('percentage', 'mean')]
-                quiz_count = int(topic_performance.loc[topic, ('percentage', 'count')])
-                best_score = topic_performance.loc[topic, ('percentage', 'max')]
-                worst_score = topic_performance.loc[topic, ('percentage', 'min')]
+            for topic in sorted(topic_stats):
+                quiz_count, score_sum, best_score, worst_score = topic_stats[topic]
+                avg_score = score_sum / quiz_count
                 
                 topic_data.append([
                     topic[:25] + "..." if len(topic) > 25 else topic,
@@ -487,16 +800,7 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
                 ])
             
             topic_table = Table(topic_data, colWidths=[2*inch, 1*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-            topic_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
+            topic_table.setStyle(topic_table_style)
             
             story.append(topic_table)
             story.append(Spacer(1, 20))
@@ -518,8 +822,8 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
         story.append(Paragraph("🎯 Personalized Recommendations", heading_style))
         
         recommendations = []
-        if not df_quizzes.empty:
-            avg_score = df_quizzes['percentage'].mean()
+        if quiz_history:
+            avg_score = total_percentage / len(quiz_history)
             
             if avg_score >= 80:
                 recommendations.append("🌟 Excellent performance! You're ready for advanced topics.")
@@ -534,9 +838,13 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
             if len(quiz_history) >= 10:
                 recommendations.append("🚀 Great consistency! Keep up the regular practice.")
         
-        for rec in recommendations:
-            story.append(Paragraph(f"• {rec}", styles['Normal']))
-            story.append(Spacer(1, 8))
+        if recommendations:
+            # One bulleted list flowable instead of a bullet-prefixed Paragraph and Spacer per item
+            story.append(ListFlowable(
+                [Paragraph(rec, list_item_style) for rec in recommendations],
+                bulletType='bullet',
+                start='•'
+            ))
         
         # Footer
         story.append(Spacer(1, 30))
@@ -546,11 +854,9 @@ def generate_analytics_pdf(user_id, user_name, user_email=None):
         # Build PDF
         doc.build(story)
         
-        # Get PDF data
-        pdf_data = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_data, None
+        # Hand back the buffer itself, rewound; st.download_button reads file-like data directly
+        buffer.seek(0)
+        return buffer, None
         
     except Exception as e:
         return None, f"Error generating PDF: {str(e)}"
\ No newline at end of file
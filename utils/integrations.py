@@ -4,41 +4,253 @@ Handles GitHub, Google Calendar, and Udemy API integrations
 """
 
 import streamlit as st
+import asyncio
+import bisect
+import hashlib
+import heapq
 import requests
 import json
-from datetime import datetime, timedelta
-import google.auth
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from utils.db import save_integration_data, get_integration_data
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.db import save_integration_data, patch_integration_data, get_integration_data, get_all_integration_data
+
+# Headers every request to a platform sends; per-user Authorization stays on each call
+# because the sessions are shared between users
+_PLATFORM_HEADERS = {
+    'github': {'Accept': 'application/vnd.github.v3+json'},
+    'google_calendar': {'Accept': 'application/json'},
+    'udemy': {'Accept': 'application/json'}
+}
+
+try:
+    # orjson parses the larger GitHub payloads several times faster; it is optional
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+def _response_json(response):
+    """Decode a response body as JSON"""
+    return _loads(response.content)
+
+@st.cache_resource
+def get_http_session(platform):
+    """Return a keep-alive HTTP session per platform, shared across reruns and users"""
+    session = requests.Session()
+    session.headers.update(_PLATFORM_HEADERS.get(platform, {}))
+    # Every encoding urllib3 can decode here: gzip/deflate always, br/zstd when brotli/zstandard are installed
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    # Pooled connections sized for the concurrent fetches, with backoff on rate limits and transient failures
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504))
+    )
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=3000, show_spinner=False)
+def _github_user(token):
+    """Verified GitHub profile for a token, reused under an hour; failures raise so they are not cached"""
+    headers = {
+        'Authorization': f'token {token}'
+    }
+    response = get_http_session('github').get("https://api.github.com/user", headers=headers)
+    response.raise_for_status()
+    return _response_json(response)
+
+@st.cache_data(ttl=3000, show_spinner=False)
+def _udemy_access_token(client_id, client_secret):
+    """Client-credentials token fields (access_token, token_type, expires_in, auth_date), reused under its one-hour lifetime; failures raise"""
+    auth_data = {
+        'grant_type': 'client_credentials',
+        'client_id': client_id,
+        'client_secret': client_secret
+    }
+    response = get_http_session('udemy').post("https://www.udemy.com/api-2.0/oauth2/token/", data=auth_data, timeout=10)
+    response.raise_for_status()
+    token_data = _response_json(response)
+    if not token_data.get('access_token'):
+        raise ValueError("Failed to get Udemy access token")
+    return {
+        'access_token': token_data['access_token'],
+        'token_type': token_data.get('token_type', 'Bearer'),
+        'expires_in': token_data.get('expires_in', 3600),
+        'auth_date': datetime.now(timezone.utc).isoformat()
+    }
+
+# Most GitHub responses kept for ETag revalidation across all users
+ETAG_CACHE_MAX_ENTRIES = 512
+
+def _token_key(authorization):
+    """Stable digest of an Authorization header, so raw tokens never sit in the cache"""
+    return hashlib.sha256((authorization or '').encode()).hexdigest()
+
+class _EtagCache:
+    """Thread-safe LRU of {(token digest, url, params): (etag, parsed body)} for GitHub conditional requests"""
+    
+    def __init__(self, max_entries=ETAG_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def forget(self, token_key):
+        """Drop every response cached for one token"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == token_key]:
+                del self._entries[key]
+
+@st.cache_resource
+def _etag_cache():
+    """Process-wide ETag cache shared by every GitHubIntegration"""
+    return _EtagCache()
+
+def forget_github_token(token):
+    """Drop cached GitHub responses for a token, e.g. when the user disconnects GitHub"""
+    _etag_cache().forget(_token_key(f'token {token}'))
+
+# Same data as GET /user/repos?sort=updated&per_page=100 plus /repos/{owner}/{repo}/commits?author=&since=,
+# but only the 5 commits per repository that are kept, with totalCount for the count
+_ACTIVITY_QUERY = """
+query($authorId: ID!, $since: GitTimestamp!) {
+  viewer {
+    repositories(first: 100, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes {
+        name
+        description
+        primaryLanguage { name }
+        stargazerCount
+        forkCount
+        updatedAt
+        defaultBranchRef {
+          target {
+            ... on Commit {
+              history(first: 5, since: $since, author: {id: $authorId}) {
+                totalCount
+                nodes { oid message authoredDate }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Profile fields kept with the saved GitHub integration; the full /user payload is not needed afterwards
+_STORED_GITHUB_USER_FIELDS = ('login', 'id', 'avatar_url', 'email', 'name')
+
+def _stored_github_user(user_data):
+    """The subset of a GitHub profile that is persisted with the integration"""
+    return {field: user_data.get(field) for field in _STORED_GITHUB_USER_FIELDS}
+
+# Stop the per-repo fan-out once fewer GitHub requests than this remain in the rate-limit window
+RATE_LIMIT_FLOOR = 10
+# Wait reported when a secondary rate limit's Retry-After header can't be parsed
+DEFAULT_RETRY_AFTER = 60
+
+class GitHubRateLimited(Exception):
+    """GitHub's secondary rate limit was hit; retry_after is the suggested wait in seconds"""
+    
+    def __init__(self, retry_after):
+        super().__init__(f"GitHub rate limit reached, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+def _retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header, which is either delay-seconds or an HTTP date"""
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0, int((retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+def _save_github_activity(activity_data):
+    """Store synced activity with the signed-in user's GitHub integration; a disconnected one has no document to update"""
+    patch_integration_data(st.session_state.user_id, 'github', {
+        'last_activity_sync': activity_data['last_updated'],
+        'activity_data': activity_data
+    })
 
 class GitHubIntegration:
     """GitHub API integration for tracking coding activity"""
     
     def __init__(self):
         self.base_url = "https://api.github.com"
+        self.session = get_http_session('github')
+        # Last X-RateLimit-Remaining GitHub reported; None until a response carries it
+        self.rate_limit_remaining = None
+        
+    def _get_json(self, url, headers, params=None):
+        """GET a GitHub endpoint as (status_code, parsed body), revalidating earlier responses by ETag
         
+        A 304 costs no rate limit and carries no body, so the previously parsed JSON is returned with a 200.
+        Raises GitHubRateLimited on a secondary rate limit rather than waiting inside the request.
+        """
+        key = (_token_key(headers.get('Authorization')), url, tuple(sorted((params or {}).items())))
+        cached = _etag_cache().get(key)
+        request_headers = {**headers, 'If-None-Match': cached[0]} if cached else headers
+        response = self.session.get(url, headers=request_headers, params=params)
+        if 'X-RateLimit-Remaining' in response.headers:
+            self.rate_limit_remaining = int(response.headers['X-RateLimit-Remaining'])
+        if response.status_code == 403 and 'Retry-After' in response.headers:
+            # Secondary rate limit (429s are already retried by the session adapter); fail fast instead of sleeping
+            raise GitHubRateLimited(_retry_after_seconds(response.headers['Retry-After']))
+        if response.status_code == 304 and cached:
+            return 200, cached[1]
+        if response.status_code != 200:
+            return response.status_code, None
+        data = _response_json(response)
+        if response.headers.get('ETag'):
+            _etag_cache().put(key, (response.headers['ETag'], data))
+        return 200, data
+    
     def authenticate(self, username, token):
         """Authenticate with GitHub using personal access token"""
         try:
-            headers = {
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json'
-            }
-            response = requests.get(f"{self.base_url}/user", headers=headers)
+            try:
+                user_data = _github_user(token)
+            except requests.exceptions.HTTPError:
+                user_data = None
             
-            if response.status_code == 200:
-                user_data = response.json()
+            if user_data:
                 # Save integration credentials securely
                 save_integration_data(st.session_state.user_id, 'github', {
                     'username': username,
                     'token': token,  # In production, encrypt this
                     'authenticated': True,
-                    'user_data': user_data,
+                    'user_data': _stored_github_user(user_data),
                     'email': user_data.get('email'),
-                    'last_sync': datetime.now().isoformat()
+                    'last_sync': datetime.now(timezone.utc).isoformat()
                 })
                 return True, user_data
             else:
@@ -50,34 +262,31 @@ class GitHubIntegration:
         """Authenticate and verify email matches the GitHub account"""
         try:
             headers = {
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json'
+                'Authorization': f'token {token}'
             }
             
-            # Get user info
-            response = requests.get(f"{self.base_url}/user", headers=headers)
-            if response.status_code != 200:
+            # Get user info (verified once per token and reused)
+            try:
+                user_data = _github_user(token)
+            except requests.exceptions.HTTPError:
                 return False, "Invalid GitHub token"
             
-            user_data = response.json()
-            
             # Get user emails (including private ones)
-            emails_response = requests.get(f"{self.base_url}/user/emails", headers=headers)
+            emails_response = self.session.get(f"{self.base_url}/user/emails", headers=headers)
             if emails_response.status_code == 200:
-                emails = emails_response.json()
-                user_emails = [e['email'] for e in emails]
+                emails = _response_json(emails_response)
+                user_emails = {e['email'].lower() for e in emails}
                 
                 # Check if provided email matches any GitHub email
-                if email.lower() in [e.lower() for e in user_emails]:
+                if email.lower() in user_emails:
                     # Save integration credentials
                     save_integration_data(st.session_state.user_id, 'github', {
                         'username': user_data['login'],
                         'token': token,
                         'authenticated': True,
-                        'user_data': user_data,
+                        'user_data': _stored_github_user(user_data),
                         'verified_email': email,
-                        'all_emails': user_emails,
-                        'last_sync': datetime.now().isoformat()
+                        'last_sync': datetime.now(timezone.utc).isoformat()
                     })
                     return True, user_data
                 else:
@@ -89,9 +298,9 @@ class GitHubIntegration:
                         'username': user_data['login'],
                         'token': token,
                         'authenticated': True,
-                        'user_data': user_data,
+                        'user_data': _stored_github_user(user_data),
                         'verified_email': email,
-                        'last_sync': datetime.now().isoformat()
+                        'last_sync': datetime.now(timezone.utc).isoformat()
                     })
                     return True, user_data
                 else:
@@ -104,173 +313,299 @@ class GitHubIntegration:
         """Fetch user's repositories"""
         try:
             headers = {
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json'
+                'Authorization': f'token {token}'
             }
-            response = requests.get(f"{self.base_url}/users/{username}/repos", headers=headers)
+            status_code, repos = self._get_json(f"{self.base_url}/users/{username}/repos", headers)
             
-            if response.status_code == 200:
-                repos = response.json()
+            if status_code == 200:
                 return True, repos
             else:
                 return False, "Failed to fetch repositories"
         except Exception as e:
             return False, str(e)
     
-    def get_real_time_activity(self, token, username, days=30):
-        """Get comprehensive real-time GitHub activity"""
+    def _fetch_activity_graphql(self, token, since_date):
+        """Repositories and their recent commits in one GraphQL round trip, shaped like the REST responses
+        
+        Returns (repos, repo_commits, commit_counts), or None when the query fails so the caller can fall back to REST.
+        """
         try:
-            headers = {
-                'Authorization': f'token {token}',
-                'Accept': 'application/vnd.github.v3+json'
+            variables = {
+                'authorId': _github_user(token)['node_id'],
+                'since': since_date
             }
+            response = self.session.post(
+                f"{self.base_url}/graphql",
+                headers={'Authorization': f'bearer {token}'},
+                json={'query': _ACTIVITY_QUERY, 'variables': variables}
+            )
+            payload = _response_json(response) if response.status_code == 200 else {}
+            if payload.get('errors') or not payload.get('data'):
+                return None
             
-            since_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            # Get user's repositories
-            repos_response = requests.get(f"{self.base_url}/user/repos", headers=headers, 
-                                        params={'sort': 'updated', 'per_page': 100})
-            
-            if repos_response.status_code != 200:
-                return False, "Failed to fetch repositories"
-            
-            repos = repos_response.json()
-            
-            # Initialize activity data
-            activity_data = {
-                'total_commits': 0,
-                'total_repositories': len(repos),
-                'languages_used': {},
-                'recent_commits': [],
-                'active_repos': [],
-                'repository_details': [],
-                'contribution_stats': {},
-                'last_updated': datetime.now().isoformat()
-            }
+            repos = []
+            repo_commits = []
+            commit_counts = []
+            for node in payload['data']['viewer']['repositories']['nodes']:
+                repos.append({
+                    'name': node['name'],
+                    'description': node['description'],
+                    'language': (node['primaryLanguage'] or {}).get('name'),
+                    'stargazers_count': node['stargazerCount'],
+                    'forks_count': node['forkCount'],
+                    'updated_at': node['updatedAt']
+                })
+                # Empty repositories have no default branch, hence no history
+                history = ((node['defaultBranchRef'] or {}).get('target') or {}).get('history') or {'totalCount': 0, 'nodes': []}
+                commit_counts.append(history['totalCount'])
+                repo_commits.append([
+                    {
+                        'sha': commit['oid'],
+                        'commit': {'message': commit['message'], 'author': {'date': commit['authoredDate']}}
+                    }
+                    for commit in history['nodes']
+                ])
+            return repos, repo_commits, commit_counts
+        except Exception as e:
+            print(f"Error fetching GitHub activity via GraphQL: {e}")
+            return None
+    
+    def fetch_activity(self, token, username, days=30, progress=None):
+        """Fetch comprehensive real-time GitHub activity without saving it; raises on failure
+        
+        The optional progress dict gets done/total repository counts as commits are fetched.
+        """
+        headers = {
+            'Authorization': f'token {token}'
+        }
+        
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        # Whole hours keep the commit URLs stable between syncs so their ETags can be revalidated
+        since_date = (now - timedelta(days=days)).replace(minute=0, second=0, microsecond=0).isoformat()
+        
+        skipped = []
+        
+        def _fetch_commits(repo):
+            # None marks a failed request so the repo is skipped, as before
+            if self.rate_limit_remaining is not None and self.rate_limit_remaining < RATE_LIMIT_FLOOR:
+                # Leave the remaining budget alone rather than run into 403s; the result is partial
+                skipped.append(repo['name'])
+                if progress is not None:
+                    progress['done'] += 1
+                return None
+            try:
+                status_code, commits = self._get_json(
+                    f"{self.base_url}/repos/{username}/{repo['name']}/commits",
+                    headers,
+                    params={'since': since_date, 'author': username, 'per_page': 50}
+                )
+                return commits if status_code == 200 else []
+            except GitHubRateLimited:
+                # Skip this and the remaining repos; the result is partial
+                self.rate_limit_remaining = 0
+                skipped.append(repo['name'])
+                return None
+            except Exception as e:
+                print(f"Error fetching commits for {repo['name']}: {e}")
+                return None
+            finally:
+                if progress is not None:
+                    progress['done'] += 1
+        
+        def _fetch_events():
+            try:
+                status_code, events = self._get_json(f"{self.base_url}/users/{username}/events", 
+                                                     headers, params={'per_page': 100})
+                return events if status_code == 200 else None
+            except Exception as e:
+                print(f"Error fetching contribution stats: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            # The events request runs alongside the repository and commit fetches
+            events_future = executor.submit(_fetch_events)
             
-            # Process each repository
-            for repo in repos:
-                repo_activity = {
-                    'name': repo['name'],
-                    'description': repo['description'],
-                    'language': repo['language'],
-                    'stars': repo['stargazers_count'],
-                    'forks': repo['forks_count'],
-                    'last_updated': repo['updated_at'],
-                    'commits_count': 0,
-                    'recent_commits': []
-                }
-                
-                # Count languages
-                if repo['language']:
-                    activity_data['languages_used'][repo['language']] = \
-                        activity_data['languages_used'].get(repo['language'], 0) + 1
+            # One GraphQL query returns every repository with its recent commits
+            fetched = self._fetch_activity_graphql(token, since_date)
+            if fetched is not None:
+                repos, repo_commits, commit_counts = fetched
+                if progress is not None:
+                    progress['total'] = progress['done'] = len(repos)
+            else:
+                # REST fallback: list the repositories, then fetch commits per repo in parallel waves
+                status_code, repos = self._get_json(f"{self.base_url}/user/repos", headers, 
+                                                    params={'sort': 'updated', 'per_page': 100})
                 
-                # Get commits for this repository
-                try:
-                    commits_response = requests.get(
-                        f"{self.base_url}/repos/{username}/{repo['name']}/commits",
-                        headers=headers,
-                        params={'since': since_date, 'author': username, 'per_page': 50}
-                    )
-                    
-                    if commits_response.status_code == 200:
-                        commits = commits_response.json()
-                        repo_activity['commits_count'] = len(commits)
-                        activity_data['total_commits'] += len(commits)
-                        
-                        # Store recent commits
-                        for commit in commits[:5]:  # Last 5 commits per repo
-                            commit_data = {
-                                'repo': repo['name'],
-                                'message': commit['commit']['message'][:100],
-                                'date': commit['commit']['author']['date'],
-                                'sha': commit['sha'][:7]
-                            }
-                            repo_activity['recent_commits'].append(commit_data)
-                            activity_data['recent_commits'].append(commit_data)
-                        
-                        # Check if repo is active (has commits in the period)
-                        if len(commits) > 0:
-                            activity_data['active_repos'].append(repo['name'])
+                if status_code != 200:
+                    raise ValueError("Failed to fetch repositories")
                 
-                except Exception as e:
-                    print(f"Error fetching commits for {repo['name']}: {e}")
-                    continue
+                if progress is not None:
+                    progress['total'] = len(repos)
                 
-                activity_data['repository_details'].append(repo_activity)
+                # map keeps repo order
+                repo_commits = list(executor.map(_fetch_commits, repos))
+                commit_counts = [len(commits) if commits is not None else 0 for commits in repo_commits]
             
-            # Get contribution stats
-            try:
-                events_response = requests.get(f"{self.base_url}/users/{username}/events", 
-                                             headers=headers, params={'per_page': 100})
-                
-                if events_response.status_code == 200:
-                    events = events_response.json()
-                    
-                    # Count different types of contributions
-                    contribution_types = {}
-                    for event in events:
-                        event_type = event['type']
-                        contribution_types[event_type] = contribution_types.get(event_type, 0) + 1
-                    
-                    activity_data['contribution_stats'] = contribution_types
+            events = events_future.result()
+        
+        # Initialize activity data
+        activity_data = {
+            'total_commits': 0,
+            'total_repositories': len(repos),
+            'languages_used': {},
+            'recent_commits': [],
+            'active_repos': [],
+            'repository_details': [],
+            'contribution_stats': {},
+            'last_updated': now_iso,
+            'rate_limited': bool(skipped)
+        }
+        
+        # Process each repository
+        for repo, commits, commit_count in zip(repos, repo_commits, commit_counts):
+            repo_activity = {
+                'name': repo['name'],
+                'description': repo['description'],
+                'language': repo['language'],
+                'stars': repo['stargazers_count'],
+                'forks': repo['forks_count'],
+                'last_updated': repo['updated_at'],
+                'commits_count': 0,
+                'recent_commits': []
+            }
             
-            except Exception as e:
-                print(f"Error fetching contribution stats: {e}")
+            if commits is None:
+                continue
             
-            # Sort recent commits by date
-            activity_data['recent_commits'] = sorted(
-                activity_data['recent_commits'], 
-                key=lambda x: x['date'], 
-                reverse=True
-            )[:20]  # Keep only the 20 most recent
-            
-            # Update saved data
-            integration_data = get_integration_data(st.session_state.user_id, 'github')
-            if integration_data:
-                integration_data.update({
-                    'last_activity_sync': datetime.now().isoformat(),
-                    'activity_data': activity_data
-                })
-                save_integration_data(st.session_state.user_id, 'github', integration_data)
+            # Record commits for this repository
+            repo_activity['commits_count'] = commit_count
+            activity_data['total_commits'] += commit_count
             
-            return True, activity_data
+            # Store recent commits
+            for commit in commits[:5]:  # Last 5 commits per repo
+                commit_data = {
+                    'repo': repo['name'],
+                    'message': commit['commit']['message'][:100],
+                    'date': commit['commit']['author']['date'],
+                    'sha': commit['sha'][:7]
+                }
+                repo_activity['recent_commits'].append(commit_data)
+                activity_data['recent_commits'].append(commit_data)
             
+            # Check if repo is active (has commits in the period)
+            if commit_count > 0:
+                activity_data['active_repos'].append(repo['name'])
+            
+            activity_data['repository_details'].append(repo_activity)
+        
+        # Count languages
+        activity_data['languages_used'] = dict(Counter(repo['language'] for repo in repos if repo['language']))
+        
+        # Get contribution stats
+        if events is not None:
+            # Count different types of contributions
+            activity_data['contribution_stats'] = dict(Counter(event['type'] for event in events))
+        
+        # Keep only the 20 most recent commits, newest first
+        activity_data['recent_commits'] = heapq.nlargest(
+            20,
+            activity_data['recent_commits'],
+            key=lambda x: x['date']
+        )
+        
+        return activity_data
+    
+    def get_real_time_activity(self, token, username, days=30, progress=None):
+        """Get comprehensive real-time GitHub activity and save it with the integration"""
+        try:
+            activity_data = self.fetch_activity(token, username, days=days, progress=progress)
         except Exception as e:
             return False, str(e)
+        _save_github_activity(activity_data)
+        return True, activity_data
+    
+    LANGUAGE_SUGGESTIONS = {
+        'Python': ('Data Science with Python', 'Django Web Development', 'Machine Learning'),
+        'JavaScript': ('React.js', 'Node.js', 'TypeScript'),
+        'Java': ('Spring Framework', 'Android Development', 'Microservices'),
+        'C++': ('System Programming', 'Game Development', 'Competitive Programming'),
+        'Go': ('Cloud Computing', 'Microservices', 'DevOps'),
+        'Rust': ('System Programming', 'WebAssembly', 'Blockchain Development')
+    }
     
     def suggest_learning_paths(self, languages_used):
         """Suggest learning paths based on GitHub activity"""
-        suggestions = []
-        
-        language_suggestions = {
-            'Python': ['Data Science with Python', 'Django Web Development', 'Machine Learning'],
-            'JavaScript': ['React.js', 'Node.js', 'TypeScript'],
-            'Java': ['Spring Framework', 'Android Development', 'Microservices'],
-            'C++': ['System Programming', 'Game Development', 'Competitive Programming'],
-            'Go': ['Cloud Computing', 'Microservices', 'DevOps'],
-            'Rust': ['System Programming', 'WebAssembly', 'Blockchain Development']
-        }
-        
-        for lang in languages_used:
-            if lang in language_suggestions:
-                suggestions.extend(language_suggestions[lang])
-        
-        return list(set(suggestions))  # Remove duplicates
+        # Remove duplicates while keeping a stable order, without building an intermediate list
+        return list(dict.fromkeys(
+            suggestion
+            for lang in languages_used
+            for suggestion in self.LANGUAGE_SUGGESTIONS.get(lang, ())
+        ))
+
+@st.cache_resource
+def _default_credentials(scopes):
+    """Application-default (Firebase service account) credentials per scope set, shared by every call"""
+    import google.auth
+    return google.auth.default(scopes=list(scopes))
+
+def _build_calendar(credentials):
+    """Calendar v3 client built from the discovery document bundled with googleapiclient, with no fetch or file cache"""
+    from googleapiclient.discovery import build
+    return build('calendar', 'v3', credentials=credentials, cache_discovery=False, static_discovery=True)
+
+def _service_account_credentials(scopes):
+    """Shared service-account credentials and project id; the token is only refreshed once it has expired"""
+    from google.auth.transport.requests import Request
+    credentials, project = _default_credentials(tuple(scopes))
+    if not credentials.valid:
+        credentials.refresh(Request())
+    return credentials, project
+
+# Seconds before a Firebase ID token's expiry at which it is verified again
+ID_TOKEN_EXPIRY_MARGIN = 30
+
+# Most verified ID tokens kept across all users
+ID_TOKEN_CACHE_MAX_ENTRIES = 256
+
+@st.cache_resource
+def _verified_id_tokens():
+    """Process-wide {sha256(id_token): decoded claims} of Firebase ID tokens that passed verification, with its lock"""
+    return threading.Lock(), {}
+
+def _verify_id_token(id_token):
+    """Verify a Firebase ID token once and reuse the decoded claims until shortly before it expires"""
+    from firebase_admin import auth
+    lock, cache = _verified_id_tokens()
+    key = hashlib.sha256(id_token.encode()).hexdigest()
+    with lock:
+        decoded_token = cache.get(key)
+    if decoded_token and decoded_token['exp'] - ID_TOKEN_EXPIRY_MARGIN > time.time():
+        return decoded_token
+    decoded_token = auth.verify_id_token(id_token)
+    now = time.time()
+    with lock:
+        # ID tokens rotate hourly, so drop the expired ones on every insert, then the oldest beyond the cap
+        for expired in [k for k, claims in cache.items() if claims['exp'] - ID_TOKEN_EXPIRY_MARGIN <= now]:
+            del cache[expired]
+        cache.pop(key, None)
+        cache[key] = decoded_token
+        while len(cache) > ID_TOKEN_CACHE_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+    return decoded_token
 
 class GoogleCalendarIntegration:
     """Google Calendar API integration through Firebase"""
     
     def __init__(self):
         self.scopes = ['https://www.googleapis.com/auth/calendar']
+        self.session = get_http_session('google_calendar')
         
     def authenticate_with_firebase(self, id_token):
         """Authenticate Google Calendar using Firebase ID token"""
         try:
-            # Verify the Firebase ID token
-            from firebase_admin import auth
-            decoded_token = auth.verify_id_token(id_token)
+            # Verify the Firebase ID token (reused across reruns until it nears expiry)
+            decoded_token = _verify_id_token(id_token)
             user_id = decoded_token['uid']
             
             # Check if user signed in with Google
@@ -284,17 +619,16 @@ class GoogleCalendarIntegration:
                     if google_access_token:
                         # Test Calendar API access
                         headers = {
-                            'Authorization': f'Bearer {google_access_token}',
-                            'Accept': 'application/json'
+                            'Authorization': f'Bearer {google_access_token}'
                         }
                         
-                        test_response = requests.get(
+                        test_response = self.session.get(
                             'https://www.googleapis.com/calendar/v3/users/me/calendarList',
                             headers=headers
                         )
                         
                         if test_response.status_code == 200:
-                            calendar_data = test_response.json()
+                            calendar_data = _response_json(test_response)
                             
                             # Save integration data
                             save_integration_data(st.session_state.user_id, 'google_calendar', {
@@ -302,7 +636,7 @@ class GoogleCalendarIntegration:
                                 'firebase_user_id': user_id,
                                 'google_access_token': google_access_token,
                                 'calendar_count': len(calendar_data.get('items', [])),
-                                'last_auth': datetime.now().isoformat(),
+                                'last_auth': datetime.now(timezone.utc).isoformat(),
                                 'auth_method': 'firebase_google'
                             })
                             
@@ -323,18 +657,11 @@ class GoogleCalendarIntegration:
         """Alternative: Use Firebase project's Google Cloud credentials"""
         try:
             # Use Firebase project's default credentials for Calendar API
-            import google.auth
-            from google.auth.transport.requests import Request
-            
-            # Get default credentials (uses Firebase service account)
-            credentials, project = google.auth.default(scopes=self.scopes)
-            
-            # Refresh credentials if needed
-            if not credentials.valid:
-                credentials.refresh(Request())
+            # Get default credentials (uses Firebase service account), refreshed only when expired
+            credentials, project = _service_account_credentials(self.scopes)
             
             # Test Calendar API access
-            service = build('calendar', 'v3', credentials=credentials)
+            service = _build_calendar(credentials)
             calendar_list = service.calendarList().list().execute()
             
             # Save integration data
@@ -343,7 +670,7 @@ class GoogleCalendarIntegration:
                 'auth_method': 'firebase_service_account',
                 'project_id': project,
                 'calendar_count': len(calendar_list.get('items', [])),
-                'last_auth': datetime.now().isoformat(),
+                'last_auth': datetime.now(timezone.utc).isoformat(),
                 'service_account': True
             })
             
@@ -393,28 +720,21 @@ class GoogleCalendarIntegration:
                 }
                 
                 # Create event via REST API
-                response = requests.post(
+                response = self.session.post(
                     'https://www.googleapis.com/calendar/v3/calendars/primary/events',
                     headers=headers,
                     json=event
                 )
                 
                 if response.status_code == 200:
-                    created_event = response.json()
+                    created_event = _response_json(response)
                     return True, f"Study session created! Event ID: {created_event.get('id')}"
                 else:
                     return False, f"Failed to create event: HTTP {response.status_code}"
                     
             elif auth_method == 'firebase_service_account':
                 # Use Firebase service account
-                import google.auth
-                from google.auth.transport.requests import Request
-                
-                credentials, _ = google.auth.default(scopes=self.scopes)
-                if not credentials.valid:
-                    credentials.refresh(Request())
-                
-                service = build('calendar', 'v3', credentials=credentials)
+                service = self._calendar_service(integration_data)
                 
                 end_time = start_time + timedelta(hours=duration_hours)
                 
@@ -447,6 +767,61 @@ class GoogleCalendarIntegration:
         except Exception as e:
             return False, f"Failed to create calendar event via Firebase: {str(e)}"
     
+    def _calendar_service(self, integration_data):
+        """Build a Calendar API client for whichever Firebase auth method is stored"""
+        # Google SDKs are only imported once a Calendar call is actually made
+        from google.oauth2.credentials import Credentials
+        
+        if integration_data.get('auth_method') == 'firebase_google':
+            credentials = Credentials(token=integration_data.get('google_access_token'))
+        else:
+            credentials, _ = _service_account_credentials(self.scopes)
+        return _build_calendar(credentials)
+    
+    def create_study_events_bulk(self, sessions):
+        """Create many study events with batched Calendar requests (up to 50 per HTTP call)"""
+        try:
+            integration_data = get_integration_data(st.session_state.user_id, 'google_calendar')
+            if not integration_data or not integration_data.get('authenticated'):
+                return False, "Not authenticated with Google Calendar via Firebase"
+            
+            service = self._calendar_service(integration_data)
+            created_ids = []
+            errors = []
+            
+            def _collect(request_id, response, exception):
+                if exception is not None:
+                    errors.append(str(exception))
+                else:
+                    created_ids.append(response.get('id'))
+            
+            for offset in range(0, len(sessions), 50):
+                batch = service.new_batch_http_request(callback=_collect)
+                for title, start_time, duration_hours, description in sessions[offset:offset + 50]:
+                    end_time = start_time + timedelta(hours=duration_hours)
+                    event = {
+                        'summary': title,
+                        'description': description,
+                        'start': {'dateTime': start_time.isoformat(), 'timeZone': 'UTC'},
+                        'end': {'dateTime': end_time.isoformat(), 'timeZone': 'UTC'},
+                        'reminders': {
+                            'useDefault': False,
+                            'overrides': [
+                                {'method': 'email', 'minutes': 24 * 60},
+                                {'method': 'popup', 'minutes': 30},
+                            ],
+                        },
+                    }
+                    batch.add(service.events().insert(calendarId='primary', body=event))
+                batch.execute()
+            
+            if errors:
+                return False, f"Created {len(created_ids)} of {len(sessions)} events; errors: {'; '.join(errors)}"
+            return True, created_ids
+            
+        except Exception as e:
+            return False, f"Failed to create calendar events in bulk: {str(e)}"
+    
     def get_upcoming_events_firebase(self, days=7):
         """Get upcoming events using Firebase-authenticated Calendar access"""
         try:
@@ -456,19 +831,18 @@ class GoogleCalendarIntegration:
             
             auth_method = integration_data.get('auth_method')
             
+            # Calculate time range (RFC 3339 UTC, as the Calendar API expects)
+            now = datetime.now(timezone.utc)
+            time_min = now.isoformat().replace('+00:00', 'Z')
+            time_max = (now + timedelta(days=days)).isoformat().replace('+00:00', 'Z')
+            
             if auth_method == 'firebase_google':
                 # Use Google access token from Firebase auth
                 access_token = integration_data.get('google_access_token')
                 headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Accept': 'application/json'
+                    'Authorization': f'Bearer {access_token}'
                 }
                 
-                # Calculate time range
-                now = datetime.utcnow()
-                time_min = now.isoformat() + 'Z'
-                time_max = (now + timedelta(days=days)).isoformat() + 'Z'
-                
                 # Get events via REST API
                 params = {
                     'timeMin': time_min,
@@ -478,32 +852,21 @@ class GoogleCalendarIntegration:
                     'orderBy': 'startTime'
                 }
                 
-                response = requests.get(
+                response = self.session.get(
                     'https://www.googleapis.com/calendar/v3/calendars/primary/events',
                     headers=headers,
                     params=params
                 )
                 
                 if response.status_code == 200:
-                    events_data = response.json()
+                    events_data = _response_json(response)
                     events = events_data.get('items', [])
                 else:
                     return False, f"Failed to fetch events: HTTP {response.status_code}"
                     
             elif auth_method == 'firebase_service_account':
                 # Use Firebase service account
-                import google.auth
-                from google.auth.transport.requests import Request
-                
-                credentials, _ = google.auth.default(scopes=self.scopes)
-                if not credentials.valid:
-                    credentials.refresh(Request())
-                
-                service = build('calendar', 'v3', credentials=credentials)
-                
-                now = datetime.utcnow()
-                time_min = now.isoformat() + 'Z'
-                time_max = (now + timedelta(days=days)).isoformat() + 'Z'
+                service = self._calendar_service(integration_data)
                 
                 events_result = service.events().list(
                     calendarId='primary',
@@ -541,11 +904,99 @@ class GoogleCalendarIntegration:
         except Exception as e:
             return False, f"Failed to fetch calendar events via Firebase: {str(e)}"
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _course_analytics(courses):
+    """Aggregate learning analytics for a list of processed Udemy courses; repeat calls with the same courses are served from cache"""
+    import numpy as np
+    import pandas as pd
+    
+    # One clock read for the recency cutoff and the timestamp
+    now = datetime.now(timezone.utc)
+    
+    # Calculate comprehensive analytics over one columnar frame (pandas keeps each field as a NumPy column)
+    df = pd.DataFrame(courses)
+    progress = df['progress_percentage']
+    total_courses = len(df)
+    
+    # Bucket every course once: [0, 10) not started, [10, 90) in progress, [90, ...) completed
+    not_started_courses, in_progress_courses, completed_courses = (
+        int(count) for count in
+        pd.cut(progress, [float('-inf'), 10, 90, float('inf')], right=False).value_counts(sort=False)
+    )
+    
+    # All column reductions in one aggregation call
+    totals = df.agg({
+        'total_duration_minutes': 'sum',
+        'progress_minutes': 'sum',
+        'progress_percentage': 'mean',
+        'rating': 'mean'
+    })
+    total_time_enrolled = float(totals['total_duration_minutes'])
+    total_time_completed = float(totals['progress_minutes'])
+    
+    avg_progress = float(totals['progress_percentage'])
+    avg_rating = float(totals['rating'])
+    
+    # Category breakdown
+    category_stats = df.groupby('category').agg(
+        count=('progress_percentage', 'size'),
+        total_progress=('progress_percentage', 'sum')
+    )
+    category_stats['avg_progress'] = category_stats['total_progress'] / category_stats['count']
+    categories = category_stats[['count', 'avg_progress', 'total_progress']].to_dict('index')
+    
+    # Learning streaks and patterns: ISO dates order like strings, so compare them without parsing
+    # (access dates that aren't YYYY-MM-DD count as not recent)
+    cutoff = (now.astimezone().date() - timedelta(days=7)).isoformat()
+    last_accessed = df['last_accessed'].astype(str).str[:10]
+    recent_activity_count = int((last_accessed.str.fullmatch(r'\d{4}-\d{2}-\d{2}') & (last_accessed >= cutoff)).sum())
+    
+    analytics = {
+        'total_courses': total_courses,
+        'completed_courses': completed_courses,
+        'in_progress_courses': in_progress_courses,
+        'not_started_courses': not_started_courses,
+        'completion_rate': round((completed_courses / total_courses) * 100, 1),
+        'average_progress': round(avg_progress, 1),
+        'average_rating': round(avg_rating, 1),
+        'total_learning_hours': round(total_time_enrolled / 60, 1),
+        'completed_learning_hours': round(total_time_completed / 60, 1),
+        'categories': categories,
+        'recent_activity_courses': recent_activity_count,
+        'courses_needing_attention': [courses[i] for i in np.flatnonzero(progress.to_numpy() < 30)],
+        'high_performing_courses': [courses[i] for i in np.flatnonzero(progress.to_numpy() > 70)],
+        'last_updated': now.isoformat()
+    }
+    
+    return analytics
+
+# Analytics for an account with no enrolled courses (read-only; copied into each result)
+_EMPTY_ANALYTICS = MappingProxyType({
+    'total_courses': 0,
+    'completed_courses': 0,
+    'in_progress_courses': 0,
+    'not_started_courses': 0,
+    'completion_rate': 0.0,
+    'average_progress': 0.0,
+    'average_rating': 0.0,
+    'total_learning_hours': 0.0,
+    'completed_learning_hours': 0.0,
+    'recent_activity_courses': 0
+})
+
+# Progress percentages at which a course becomes Started, In Progress and Completed
+COURSE_STATUS_THRESHOLDS = (10, 50, 90)
+COURSE_STATUS_LABELS = ('Enrolled', 'Started', 'In Progress', 'Completed')
+
+# Seconds a stored Udemy course sync is reused for analytics before the API is called again
+COURSE_SYNC_TTL = 600
+
 class UdemyIntegration:
     """Udemy API integration for course progress tracking"""
     
     def __init__(self):
         self.base_url = "https://www.udemy.com/api-2.0"
+        self.session = get_http_session('udemy')
     
     def authenticate_with_email(self, email, client_id, client_secret):
         """Authenticate with Udemy API using real credentials"""
@@ -562,10 +1013,10 @@ class UdemyIntegration:
             }
             
             try:
-                auth_response = requests.post(auth_url, data=auth_data, timeout=10)
+                auth_response = self.session.post(auth_url, data=auth_data, timeout=10)
                 
                 if auth_response.status_code == 200:
-                    token_data = auth_response.json()
+                    token_data = _response_json(auth_response)
                     access_token = token_data.get('access_token')
                     
                     if access_token:
@@ -575,7 +1026,7 @@ class UdemyIntegration:
                             'client_secret': client_secret,  # In production, encrypt this
                             'authenticated': True,
                             'verified_email': email,
-                            'auth_date': datetime.now().isoformat(),
+                            'auth_date': datetime.now(timezone.utc).isoformat(),
                             'access_token': access_token,
                             'token_type': token_data.get('token_type', 'Bearer'),
                             'expires_in': token_data.get('expires_in', 3600)
@@ -616,40 +1067,40 @@ class UdemyIntegration:
             if not client_id or not client_secret:
                 return False, "Missing Udemy API credentials"
             
-            # Authenticate with Udemy API
-            auth_url = f"{self.base_url}/oauth2/token/"
-            auth_data = {
-                'grant_type': 'client_credentials',
-                'client_id': client_id,
-                'client_secret': client_secret
-            }
+            # Reuse the stored token until a minute before it expires
+            access_token = integration_data.get('access_token')
+            token_expiry = None
+            if access_token and integration_data.get('auth_date'):
+                # astimezone reads dates saved before they carried an offset as local time
+                token_expiry = datetime.fromisoformat(integration_data['auth_date']).astimezone(timezone.utc) + \
+                    timedelta(seconds=integration_data.get('expires_in', 3600) - 60)
             
-            try:
-                auth_response = requests.post(auth_url, data=auth_data)
-                if auth_response.status_code != 200:
-                    return False, f"Udemy authentication failed: {auth_response.status_code}"
-                
-                access_token = auth_response.json().get('access_token')
-                if not access_token:
-                    return False, "Failed to get Udemy access token"
-                
-            except requests.exceptions.RequestException as e:
-                return False, f"Network error during Udemy authentication: {str(e)}"
+            if token_expiry is None or datetime.now(timezone.utc) >= token_expiry:
+                # Authenticate with Udemy API; the new token is saved with the course sync below
+                try:
+                    token_data = _udemy_access_token(client_id, client_secret)
+                except requests.exceptions.HTTPError as e:
+                    return False, f"Udemy authentication failed: {e.response.status_code}"
+                except ValueError as e:
+                    return False, str(e)
+                except requests.exceptions.RequestException as e:
+                    return False, f"Network error during Udemy authentication: {str(e)}"
+                access_token = token_data['access_token']
+                integration_data.update(token_data)
             
             # Get user's enrolled courses using Udemy API
             headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Accept': 'application/json'
+                'Authorization': f'Bearer {access_token}'
             }
             
             try:
                 # Note: Udemy's public API has limitations for user-specific data
                 # This endpoint may require additional permissions or may not be available
                 courses_url = f"{self.base_url}/users/me/subscribed-courses/"
-                courses_response = requests.get(courses_url, headers=headers)
+                courses_response = self.session.get(courses_url, headers=headers)
                 
                 if courses_response.status_code == 200:
-                    courses_data = courses_response.json()
+                    courses_data = _response_json(courses_response)
                     courses = courses_data.get('results', [])
                     
                     # Process real course data
@@ -672,29 +1123,24 @@ class UdemyIntegration:
                             'image': course.get('image_240x135', '')
                         }
                         
-                        # Calculate progress percentages
-                        if processed_course['total_lectures'] > 0:
-                            processed_course['progress_percentage'] = round(
-                                (processed_course['completed_lectures'] / processed_course['total_lectures']) * 100, 1
-                            )
-                        else:
-                            processed_course['progress_percentage'] = 0
+                        # Progress percentage to one decimal place, rounded half up in integer arithmetic
+                        total_lectures = processed_course['total_lectures'] or 0
+                        completed_lectures = processed_course['completed_lectures'] or 0
+                        processed_course['progress_percentage'] = (
+                            (completed_lectures * 2000 + total_lectures) // (2 * total_lectures) / 10
+                            if total_lectures > 0 else 0
+                        )
                         
                         # Determine status based on real progress
-                        if processed_course['progress_percentage'] >= 90:
-                            processed_course['status'] = 'Completed'
-                        elif processed_course['progress_percentage'] >= 50:
-                            processed_course['status'] = 'In Progress'
-                        elif processed_course['progress_percentage'] >= 10:
-                            processed_course['status'] = 'Started'
-                        else:
-                            processed_course['status'] = 'Enrolled'
+                        processed_course['status'] = COURSE_STATUS_LABELS[
+                            bisect.bisect_right(COURSE_STATUS_THRESHOLDS, processed_course['progress_percentage'])
+                        ]
                         
                         processed_courses.append(processed_course)
                     
                     # Update integration data with real courses
                     integration_data['courses'] = processed_courses
-                    integration_data['last_course_sync'] = datetime.now().isoformat()
+                    integration_data['last_course_sync'] = datetime.now(timezone.utc).isoformat()
                     save_integration_data(st.session_state.user_id, 'udemy', integration_data)
                     
                     return True, processed_courses
@@ -712,112 +1158,242 @@ class UdemyIntegration:
         except Exception as e:
             return False, f"Unexpected error: {str(e)}"
     
+    def _recently_synced_courses(self):
+        """Courses stored by the last sync if it is under COURSE_SYNC_TTL seconds old, else None"""
+        integration_data = get_integration_data(st.session_state.user_id, 'udemy')
+        if not integration_data or not integration_data.get('courses') or not integration_data.get('last_course_sync'):
+            return None
+        # astimezone reads timestamps saved before they carried an offset as local time
+        synced_at = datetime.fromisoformat(integration_data['last_course_sync']).astimezone(timezone.utc)
+        if datetime.now(timezone.utc) - synced_at >= timedelta(seconds=COURSE_SYNC_TTL):
+            return None
+        return integration_data['courses']
+    
     def get_detailed_analytics(self, email):
         """Get detailed learning analytics from Udemy data"""
         try:
-            success, courses = self.get_real_enrolled_courses(email)
-            if not success:
-                return False, courses
+            courses = self._recently_synced_courses()
+            if courses is None:
+                success, courses = self.get_real_enrolled_courses(email)
+                if not success:
+                    return False, courses
             
             if not courses:
-                return False, "No courses found"
-            
-            # Calculate comprehensive analytics
-            total_courses = len(courses)
-            completed_courses = len([c for c in courses if c['progress_percentage'] >= 90])
-            in_progress_courses = len([c for c in courses if 10 <= c['progress_percentage'] < 90])
-            not_started_courses = len([c for c in courses if c['progress_percentage'] < 10])
-            
-            total_time_enrolled = sum(c['total_duration_minutes'] for c in courses)
-            total_time_completed = sum(c['progress_minutes'] for c in courses)
-            
-            avg_progress = sum(c['progress_percentage'] for c in courses) / total_courses
-            avg_rating = sum(c['rating'] for c in courses) / total_courses
-            
-            # Category breakdown
-            categories = {}
-            for course in courses:
-                cat = course['category']
-                if cat not in categories:
-                    categories[cat] = {'count': 0, 'avg_progress': 0, 'total_progress': 0}
-                categories[cat]['count'] += 1
-                categories[cat]['total_progress'] += course['progress_percentage']
-            
-            for cat in categories:
-                categories[cat]['avg_progress'] = categories[cat]['total_progress'] / categories[cat]['count']
-            
-            # Learning streaks and patterns
-            recent_activity = [c for c in courses 
-                             if (datetime.now() - datetime.strptime(c['last_accessed'], '%Y-%m-%d')).days <= 7]
-            
-            analytics = {
-                'total_courses': total_courses,
-                'completed_courses': completed_courses,
-                'in_progress_courses': in_progress_courses,
-                'not_started_courses': not_started_courses,
-                'completion_rate': round((completed_courses / total_courses) * 100, 1),
-                'average_progress': round(avg_progress, 1),
-                'average_rating': round(avg_rating, 1),
-                'total_learning_hours': round(total_time_enrolled / 60, 1),
-                'completed_learning_hours': round(total_time_completed / 60, 1),
-                'categories': categories,
-                'recent_activity_courses': len(recent_activity),
-                'courses_needing_attention': [c for c in courses if c['progress_percentage'] < 30],
-                'high_performing_courses': [c for c in courses if c['progress_percentage'] > 70],
-                'last_updated': datetime.now().isoformat()
-            }
+                # Fresh containers per call; the scalar zeros are shared
+                return True, {
+                    **_EMPTY_ANALYTICS,
+                    'categories': {},
+                    'courses_needing_attention': [],
+                    'high_performing_courses': [],
+                    'last_updated': datetime.now(timezone.utc).isoformat()
+                }
             
-            return True, analytics
+            return True, _course_analytics(courses)
             
         except Exception as e:
             return False, str(e)
 
+def _is_connected(data):
+    """Whether stored integration data belongs to an authenticated connection"""
+    return bool(data and data.get('authenticated'))
+
 def get_integration_status(user_id):
     """Get the status of all integrations for a user"""
     status = {}
     
-    # Check each integration
-    for platform in ['github', 'google_calendar', 'udemy']:
-        data = get_integration_data(user_id, platform)
+    # Check each integration (all documents come back in one read)
+    for platform, data in get_all_integration_data(user_id).items():
         status[platform] = {
-            'connected': data is not None and data.get('authenticated', False),
+            'connected': _is_connected(data),
             'last_sync': data.get('last_sync') if data else None
         }
     
     return status
 
-def sync_all_integrations(user_id):
-    """Sync data from all connected integrations"""
-    results = {}
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cached_integration_status(user_id):
+    """Cached wrapper around get_integration_status; clear() it after connect, disconnect or sync"""
+    return get_integration_status(user_id)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_github_activity(token, username, _progress=None):
+    """GitHub activity shared for the TTL; failures raise so they are not cached"""
+    return GitHubIntegration().fetch_activity(token, username, progress=_progress)
+
+def clear_cached_github_activity(token, username):
+    """Make the next get_cached_github_activity call go back to the GitHub API"""
+    _cached_github_activity.clear(token, username)
+
+def get_cached_github_activity(token, username, _progress=None):
+    """GitHub activity, fetched at most once per TTL, saved for the signed-in user on every call"""
+    try:
+        activity_data = _cached_github_activity(token, username, _progress=_progress)
+    except Exception as e:
+        return False, str(e)
+    _save_github_activity(activity_data)
+    return True, activity_data
+
+def _udemy_result_or_raise(result):
+    """Unwrap a (success, data) Udemy result, raising on failure so it is not cached"""
+    success, data = result
+    if not success:
+        raise ValueError(data)
+    return data
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_udemy_courses(user_id, email):
+    """Udemy enrolled courses shared for the TTL, keyed per user; failures raise"""
+    return _udemy_result_or_raise(UdemyIntegration().get_real_enrolled_courses(email))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_udemy_analytics(user_id, email):
+    """Udemy analytics shared for the TTL, keyed per user; failures raise"""
+    return _udemy_result_or_raise(UdemyIntegration().get_detailed_analytics(email))
+
+def clear_cached_udemy(user_id, email):
+    """Make the next Udemy courses and analytics calls go back to the API, e.g. after a reconnect"""
+    _cached_udemy_courses.clear(user_id, email)
+    _cached_udemy_analytics.clear(user_id, email)
+
+def get_cached_udemy_courses(user_id, email):
+    """Cached Udemy enrolled-courses fetch, keyed per user"""
+    try:
+        return True, _cached_udemy_courses(user_id, email)
+    except Exception as e:
+        return False, str(e)
+
+def get_cached_udemy_analytics(user_id, email):
+    """Cached Udemy analytics fetch, keyed per user"""
+    try:
+        return True, _cached_udemy_analytics(user_id, email)
+    except Exception as e:
+        return False, str(e)
+
+def _sync_github(github_data, user_email):
+    """Sync GitHub activity using the stored GitHub integration data"""
+    github = GitHubIntegration()
+    success, activity = github.get_real_time_activity(
+        github_data['token'], 
+        github_data['username']
+    )
+    return {'success': success, 'data': activity if success else None}
+
+def _sync_google_calendar(calendar_data, user_email):
+    """Sync upcoming calendar events"""
+    calendar = GoogleCalendarIntegration()
+    success, events = calendar.get_upcoming_events_firebase()
+    return {'success': success, 'data': events if success else None}
+
+def _sync_udemy(udemy_data, user_email):
+    """Sync Udemy analytics"""
+    udemy = UdemyIntegration()
+    success, analytics = udemy.get_detailed_analytics(user_email)
+    return {'success': success, 'data': analytics if success else None}
+
+_PLATFORM_SYNCS = {
+    'github': _sync_github,
+    'google_calendar': _sync_google_calendar,
+    'udemy': _sync_udemy
+}
+
+def _run_concurrently(*calls, on_done=None):
+    """Run independent (func, *args) calls on worker threads; exceptions are returned, not raised
     
+    on_done(index, outcome) is called on the calling thread as each call finishes.
+    """
+    ctx = get_script_run_ctx()
+    
+    def _run(func, *args):
+        # Worker threads need the script context for st.session_state access
+        add_script_run_ctx(ctx=ctx)
+        return func(*args)
+    
+    async def _tracked(index, call):
+        try:
+            outcome = await asyncio.to_thread(_run, *call)
+        except Exception as e:
+            outcome = e
+        if on_done is not None:
+            on_done(index, outcome)
+        return outcome
+    
+    async def _gather():
+        return await asyncio.gather(*(_tracked(i, call) for i, call in enumerate(calls)))
+    
+    return asyncio.run(_gather())
+
+def sync_all_integrations(user_id, on_platform_done=None):
+    """Sync data from all connected integrations concurrently
+    
+    on_platform_done(platform, result) is called as each connected platform finishes.
+    """
     # Get user email from session
     user_email = st.session_state.get('user_email', '')
+    # One batched read decides which platforms are connected; unconnected ones are skipped
+    integration_data = get_all_integration_data(user_id, tuple(_PLATFORM_SYNCS))
+    platforms = [p for p in _PLATFORM_SYNCS if _is_connected(integration_data[p])]
+    results = {}
     
-    # GitHub sync
-    github_data = get_integration_data(user_id, 'github')
-    if github_data and github_data.get('authenticated'):
-        github = GitHubIntegration()
-        success, activity = github.get_real_time_activity(
-            github_data['token'], 
-            github_data['username']
-        )
-        results['github'] = {'success': success, 'data': activity if success else None}
-    
-    # Google Calendar sync
-    calendar_data = get_integration_data(user_id, 'google_calendar')
-    if calendar_data and calendar_data.get('authenticated'):
-        calendar = GoogleCalendarIntegration()
-        success, events = calendar.get_upcoming_events()
-        results['google_calendar'] = {'success': success, 'data': events if success else None}
+    def _collect(index, outcome):
+        platform = platforms[index]
+        if isinstance(outcome, Exception):
+            print(f"Error syncing {platform}: {outcome!r}")
+            outcome = {'success': False, 'data': None, 'error': str(outcome)}
+        results[platform] = outcome
+        if on_platform_done is not None:
+            on_platform_done(platform, outcome)
     
-    # Udemy sync
-    udemy_data = get_integration_data(user_id, 'udemy')
-    if udemy_data and udemy_data.get('authenticated'):
-        udemy = UdemyIntegration()
-        success, analytics = udemy.get_detailed_analytics(user_email)
-        results['udemy'] = {'success': success, 'data': analytics if success else None}
+    _run_concurrently(
+        *((_PLATFORM_SYNCS[p], integration_data[p], user_email) for p in platforms),
+        on_done=_collect
+    )
     
-    return results
+    # Keep the platform order stable regardless of completion order
+    return {platform: results[platform] for platform in platforms if platform in results}
+
+def _github_insights(github_data):
+    """Summarize recent GitHub activity; None when not connected or the fetch fails"""
+    if not _is_connected(github_data):
+        return None
+    # Shares the cached activity the Integrations tabs already fetched
+    success, activity = get_cached_github_activity(github_data['token'], github_data['username'])
+    if not success:
+        return None
+    return {
+        'total_commits': activity['total_commits'],
+        'active_repos': len(activity['active_repos']),
+        'languages': list(activity['languages_used'].keys()),
+        'recent_activity': activity['recent_commits'][:5]
+    }
+
+def _udemy_insights(udemy_data, user_id, user_email):
+    """Summarize Udemy course analytics; None when not connected or the fetch fails"""
+    if not _is_connected(udemy_data):
+        return None
+    success, analytics = get_cached_udemy_analytics(user_id, user_email)
+    if not success:
+        return None
+    return {
+        'completion_rate': analytics['completion_rate'],
+        'total_courses': analytics['total_courses'],
+        'learning_hours': analytics['completed_learning_hours'],
+        'categories': list(analytics['categories'].keys())
+    }
+
+# Cross-platform recommendation rules:
+# (GitHub languages required, commits to exceed, Udemy category missing, recommendation)
+CROSS_PLATFORM_RULES = (
+    (frozenset({'Python'}), -1, 'Data Science', {
+        'type': 'course_suggestion',
+        'title': 'Complete a Data Science course',
+        'reason': 'You are active in Python - perfect for Data Science!'
+    }),
+    (frozenset(), 50, 'DevOps', {
+        'type': 'skill_development',
+        'title': 'Learn DevOps and CI/CD',
+        'reason': 'Your high coding activity suggests you\'d benefit from DevOps skills'
+    }),
+)
 
 def get_user_learning_insights(user_id, user_email):
     """Get comprehensive learning insights from all connected platforms"""
@@ -830,56 +1406,34 @@ def get_user_learning_insights(user_id, user_email):
     }
     
     try:
-        # GitHub insights
-        github_data = get_integration_data(user_id, 'github')
-        if github_data and github_data.get('authenticated'):
-            github = GitHubIntegration()
-            success, activity = github.get_real_time_activity(
-                github_data['token'], 
-                github_data['username']
-            )
-            if success:
-                insights['github'] = {
-                    'total_commits': activity['total_commits'],
-                    'active_repos': len(activity['active_repos']),
-                    'languages': list(activity['languages_used'].keys()),
-                    'recent_activity': activity['recent_commits'][:5]
-                }
-        
-        # Udemy insights
-        udemy_data = get_integration_data(user_id, 'udemy')
-        if udemy_data and udemy_data.get('authenticated'):
-            udemy = UdemyIntegration()
-            success, analytics = udemy.get_detailed_analytics(user_email)
-            if success:
-                insights['udemy'] = {
-                    'completion_rate': analytics['completion_rate'],
-                    'total_courses': analytics['total_courses'],
-                    'learning_hours': analytics['completed_learning_hours'],
-                    'categories': list(analytics['categories'].keys())
-                }
+        # Both integration documents come back in one read, then the
+        # independent GitHub and Udemy API calls run together
+        integration_data = get_all_integration_data(user_id, ('github', 'udemy'))
+        github_insights, udemy_insights = _run_concurrently(
+            (_github_insights, integration_data['github']),
+            (_udemy_insights, integration_data['udemy'], user_id, user_email)
+        )
+        for platform, outcome in (('github', github_insights), ('udemy', udemy_insights)):
+            if isinstance(outcome, Exception):
+                raise outcome
+            insights[platform] = outcome
         
         # Generate AI-powered recommendations
         recommendations = []
         
         if insights['github'] and insights['udemy']:
-            github_languages = set(insights['github']['languages'])
-            udemy_categories = set(insights['udemy']['categories'])
+            github_languages = frozenset(insights['github']['languages'])
+            udemy_categories = frozenset(insights['udemy']['categories'])
+            total_commits = insights['github']['total_commits']
             
             # Cross-platform recommendations
-            if 'Python' in github_languages and 'Data Science' not in udemy_categories:
-                recommendations.append({
-                    'type': 'course_suggestion',
-                    'title': 'Complete a Data Science course',
-                    'reason': 'You are active in Python - perfect for Data Science!'
-                })
-            
-            if insights['github']['total_commits'] > 50 and 'DevOps' not in udemy_categories:
-                recommendations.append({
-                    'type': 'skill_development',
-                    'title': 'Learn DevOps and CI/CD',
-                    'reason': 'Your high coding activity suggests you\'d benefit from DevOps skills'
-                })
+            recommendations.extend(
+                dict(recommendation)
+                for languages, min_commits, missing_category, recommendation in CROSS_PLATFORM_RULES
+                if languages <= github_languages
+                and total_commits > min_commits
+                and missing_category not in udemy_categories
+            )
         
         elif insights['udemy'] and not insights['github']:
             recommendations.append({
@@ -1,23 +1,60 @@
 # utils/youtube.py
 
+import functools
+import re
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
 from youtubesearchpython import VideosSearch
 
+_VIDEO_ID_RE = re.compile(r'(?:watch\?v=|youtu\.be/|embed/)([^&?]+)')
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _top_video_link(query):
+    """Link of the top search result for a query, or None; search errors raise so they are not cached"""
+    # We only need the top result, so we limit the search to 1
+    results = VideosSearch(query, limit=1).result()
+
+    # Check if any videos were found
+    if results and 'result' in results and len(results['result']) > 0:
+        # Return the link of the first video
+        return results['result'][0]['link']
+    return None # Return None if no video was found
+
+# Concurrent searches issued by find_youtube_videos
+SEARCH_WORKERS = 8
+
+def _normalize_title(video_title):
+    return " ".join(video_title.lower().split())
+
 def find_youtube_video(video_title):
     """
     Searches YouTube for a given title and returns the URL of the top result.
+    Results are cached for a day per normalized title.
     """
     try:
-        # We only need the top result, so we limit the search to 1
-        search = VideosSearch(video_title, limit=1)
-        results = search.result()
-
-        # Check if any videos were found
-        if results and 'result' in results and len(results['result']) > 0:
-            # Return the link of the first video
-            return results['result'][0]['link']
-        else:
-            return None # Return None if no video was found
+        return _top_video_link(_normalize_title(video_title))
     except Exception as e:
         # Print an error for debugging but don't crash the app
         print(f"An error occurred during YouTube search: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def find_youtube_videos(video_titles):
+    """
+    Looks up the top result for each title, searching concurrently.
+    Returns a list of URLs (or None) in the same order as video_titles.
+    """
+    # Titles that normalize to the same query are searched once
+    unique = list(dict.fromkeys(_normalize_title(title) for title in video_titles))
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=min(SEARCH_WORKERS, len(unique))) as executor:
+        links = dict(zip(unique, executor.map(find_youtube_video, unique)))
+    return [links[_normalize_title(title)] for title in video_titles]
+
+@functools.lru_cache(maxsize=256)
+def get_video_id(url_link):
+    """
+    Extracts the video id from a YouTube watch, short or embed URL.
+    """
+    match = _VIDEO_ID_RE.search(url_link)
+    return match.group(1) if match else url_link